@@ -1,36 +1,179 @@
+import json
 import os
+import sys
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # lyons/, for instrumentation.py
+import instrumentation
+from compressed_io import open_input, open_output
+from extract_traffic_data import RUN_CSV_SUFFIX, match_run_csv
+from result_cache import file_hash
+
+
+def run_name(filename):
+    """Run name of a run CSV, e.g. AM_110_SAtrue.csv.gz -> AM_110_SAtrue"""
+    return RUN_CSV_SUFFIX.sub("", filename)
+
+
 def parse_filename(filename):
     """Extracts time of day, traffic light cycle time, and signal actuation from the filename."""
-    parts = filename.split("_")
-    time_of_day = parts[0]  # AM, PM, LT
-    cycle_time = parts[1]  # 70, 90, 110
-    signal_actuation = "On" if "SAtrue" in parts[2] else "Off"
-    return time_of_day, cycle_time, signal_actuation
+    match = match_run_csv(filename)
+    # A single seed of a cell needs its <name>.json to be told apart from the cell
+    if match is None or match["seed"] is not None:
+        return None, None, None
+    signal_actuation = "On" if match["actuated"] == "true" else "Off"
+    return match["label"], int(match["cycle_time"]), signal_actuation
+
+
+def run_parameters(directory, filename):
+    """Typed run parameters, from the <name>.json written by run_sweep.py when present, else the file name"""
+    if not RUN_CSV_SUFFIX.search(filename):
+        return None, None, None
+    info_file = os.path.join(directory, run_name(filename) + ".json")
+    if os.path.exists(info_file):
+        with open(info_file) as file:
+            info = json.load(file)
+        return info["label"], int(info["cycle_time"]), "On" if info["actuated"] else "Off"
+    return parse_filename(filename)
+
+
+def load_manifest(manifest_file):
+    try:
+        with open(manifest_file) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(manifest, manifest_file):
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, "w") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(tmp_file, manifest_file)
+
+
+def read_run(directory, filename):
+    """One run CSV with its parameters as leading columns"""
+    time_of_day, cycle_time, signal_actuation = run_parameters(directory, filename)
+    instrumentation.count_bytes(os.path.join(directory, filename))
+    with open_input(os.path.join(directory, filename)) as file:
+        df = pd.read_csv(file)
+    df.insert(0, "Run", run_name(filename))
+    df.insert(1, "Time of Day", time_of_day)
+    df.insert(2, "Traffic Light Cycle Time", cycle_time)
+    df.insert(3, "Signal Actuation", signal_actuation)
+    return df
+
+
+def scan_runs(directory, manifest):
+    """Run CSVs that are new or changed since the manifest, and runs that changed or disappeared
+
+    Updates the manifest in place.
+    """
+    seen = set()
+    new_runs = []
+    stale_runs = set()
+    for entry in os.scandir(directory):
+        if not entry.is_file() or run_parameters(directory, entry.name)[0] is None:
+            continue
+        seen.add(entry.name)
+
+        stat = entry.stat()
+        known = manifest.get(entry.name)
+        if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+            continue
+
+        digest = file_hash(entry.path)
+        if known and known["sha256"] == digest:
+            # Touched but not changed
+            known["mtime_ns"] = stat.st_mtime_ns
+            continue
+
+        if known:
+            stale_runs.add(entry.name)
+        new_runs.append(entry.name)
+        manifest[entry.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+
+    for filename in set(manifest) - seen:
+        stale_runs.add(filename)
+        del manifest[filename]
+    return sorted(new_runs), stale_runs
+
 
 def process_csv_files(directory, output_file):
-    """Reads all CSV files in the directory, extracts data, adds parameters, and writes to a final file."""
-    all_data = []
-    
-    for filename in os.listdir(directory):
-        if filename.endswith(".csv") and filename != output_file:
-            file_path = os.path.join(directory, filename)
-            
-            time_of_day, cycle_time, signal_actuation = parse_filename(filename)
-            
-            df = pd.read_csv(file_path)
-            df["Time of Day"] = time_of_day
-            df["Traffic Light Cycle Time"] = cycle_time
-            df["Signal Actuation"] = signal_actuation
-            
-            all_data.append(df)
-    
-    final_df = pd.concat(all_data, ignore_index=True)
-    final_df.to_csv(os.path.join(directory, output_file), index=False)
-    print(f"Final dataset saved as {output_file}")
-
-# Run the script
-directory_path = "./"  # Change this if needed
-output_filename = "final_data.csv"
-process_csv_files(directory_path, output_filename)
\ No newline at end of file
+    """Adds new or changed run CSVs in the directory to the final file, keeping a manifest of what is in it.
+
+    A run whose size and mtime are unchanged is skipped without being read,
+    new runs are appended to the final file, and only a changed or deleted
+    run (or a new column) rewrites it. Runs and the final file may be gzip or
+    zstd compressed; the final file is written compressed when its name ends
+    in .gz or .zst.
+    """
+    output_path = os.path.join(directory, output_file)
+    manifest_file = output_path + ".manifest.json"
+
+    header = None
+    if os.path.exists(output_path):
+        with open_input(output_path) as file:
+            header = list(pd.read_csv(file, nrows=0).columns)
+        if "Run" not in header:
+            # Written before runs were tracked: its rows cannot be matched to
+            # run files, so rebuild it from the runs instead of merging
+            print(f"{output_file} has no Run column, rebuilding it from the run CSVs")
+            header = None
+        elif not os.path.exists(manifest_file):
+            # The manifest is not committed: on a fresh checkout nothing tells
+            # which runs the final file holds, so rebuild it rather than append
+            print(f"{output_file} has no manifest, rebuilding it from the run CSVs")
+            header = None
+    manifest = load_manifest(manifest_file) if header is not None else {}
+
+    with instrumentation.stage("scan"):
+        new_runs, stale_runs = scan_runs(directory, manifest)
+
+    with instrumentation.stage("read_runs"):
+        new_data = [read_run(directory, filename) for filename in new_runs]
+        new_df = pd.concat(new_data, ignore_index=True) if new_data else None
+    instrumentation.count("runs_read", len(new_runs))
+
+    needs_rewrite = header is None or bool(stale_runs) or \
+        (new_df is not None and not set(new_df.columns) <= set(header))
+
+    if needs_rewrite:
+        frames = []
+        with instrumentation.stage("read_final"):
+            if header is not None:
+                with open_input(output_path) as file:
+                    existing = pd.read_csv(file)
+                stale_names = {run_name(filename) for filename in stale_runs}
+                frames.append(existing[~existing["Run"].isin(stale_names)])
+        if new_df is not None:
+            frames.append(new_df)
+        if not frames:
+            print("No valid CSV files found to process.")
+            return
+        with instrumentation.stage("write"):
+            final_df = pd.concat(frames, ignore_index=True)
+            with open_output(output_path, "wt") as file:
+                final_df.to_csv(file, index=False)
+        instrumentation.count("rows_written", len(final_df))
+        print(f"Final dataset rebuilt as {output_file} ({len(final_df)} rows)")
+    elif new_df is not None:
+        with instrumentation.stage("write"):
+            # A compressed final file gets a new member/frame, read back as one stream
+            with open_output(output_path, "at") as file:
+                new_df.reindex(columns=header).to_csv(file, header=False, index=False)
+        instrumentation.count("rows_written", len(new_df))
+        print(f"Appended {len(new_runs)} run(s) to {output_file}")
+    else:
+        print(f"{output_file} is up to date")
+
+    save_manifest(manifest, manifest_file)
+    instrumentation.write_report(instrumentation.report_file_for(output_path), "dataOrganizer")
+
+
+if __name__ == "__main__":
+    instrumentation.enable()  # LYONS_PROFILE=1 writes final_data.timing.json
+    directory_path = "./"  # Change this if needed
+    output_filename = "final_data.csv"
+    process_csv_files(directory_path, output_filename)
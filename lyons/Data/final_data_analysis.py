@@ -1,54 +1,246 @@
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# Load the CSV file
-df = pd.read_csv("final_data.csv")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # lyons/, for time_series.py
+import instrumentation
+from compressed_io import open_input
+from result_cache import atomic_output, derived_cache_file
+from results_db import query_summary
+from time_series import load_time_series, resample_series
+
+# Resolution of the trajectory plots (s), coarser than the 60 s detector intervals
+TRAJECTORY_PERIOD = 300
+
+# Summaries of earlier runs, keyed by the hash of the data they were computed from
+SUMMARY_CACHE_DIR = ".analysis_cache"
+# Version of summarize_data's output, see result_cache.derived_cache_file
+SUMMARY_VERSION = 1
+
+# 95% CI columns written by run_sweep.py --replications, per summary metric
+CI_COLUMNS = {
+    "avg_flow_rate": "CI95 Flow Rate (veh/hr)",
+    "avg_density": "CI95 Density (veh/km)",
+    "avg_inter_distance": "CI95 Inter-Vehicular Distance (m)",
+}
+
+# Visualizing the effect of traffic light cycle time and actuation, and AM vs PM vs Night traffic
+METRIC_TITLES = {
+    "avg_flow_rate": "Flow Rate (veh/hr)",
+    "avg_density": "Density (veh/km)",
+    "avg_inter_distance": "Inter-Vehicular Distance (m)",
+}
+GROUPINGS = {
+    "Signal Actuation": ("analysis", "Effect of Traffic Light Cycle Time and Signal Actuation on {title}"),
+    "Time of Day": ("time_comparison", "Comparison of AM, PM, and Night Traffic for {title}"),
+}
+TRAJECTORY_TITLES = {"flow": "Flow Rate (veh/hr)", "density": "Density (veh/km)",
+                     "spacing": "Inter-Vehicular Distance (m)"}
+
+
+def load_data(data_file):
+    """Load the CSV file (plain, gzip or zstd) and convert the categorical columns"""
+    with open_input(data_file) as file:
+        df = pd.read_csv(file)
+    df["Time of Day"] = df["Time of Day"].astype("category")
+    df["Signal Actuation"] = df["Signal Actuation"].astype("category")
+    df["Direction"] = df["Direction"].astype("category")
+    return df
+
+
+def combine_ci(ci):
+    """CI of a mean of independent means, from their CIs"""
+    ci = ci.dropna()
+    return np.sqrt((ci ** 2).sum()) / len(ci) if len(ci) else np.nan
 
-# Convert categorical columns
-df["Time of Day"] = df["Time of Day"].astype("category")
-df["Signal Actuation"] = df["Signal Actuation"].astype("category")
-df["Direction"] = df["Direction"].astype("category")
 
 # Summary statistics
 def summarize_data(df):
-    summary = df.groupby(["Time of Day", "Traffic Light Cycle Time", "Signal Actuation"]).agg(
+    aggregations = dict(
         avg_flow_rate=("Average Flow Rate (veh/hr)", "mean"),
         avg_density=("Average Density (veh/km)", "mean"),
         avg_inter_distance=("Average Inter-Vehicular Distance (m)", "mean")
+    )
+    for metric, column in CI_COLUMNS.items():
+        if column in df:
+            aggregations[f"{metric}_ci"] = (column, combine_ci)
+
+    summary = df.groupby(["Time of Day", "Traffic Light Cycle Time", "Signal Actuation"], observed=True).agg(
+        **aggregations
     ).reset_index()
     return summary
 
-summary_df = summarize_data(df)
-summary_df.to_csv("sumo_analysis_summary.csv", index=False)
-print(summary_df)
-
-# Visualizing the effect of traffic light cycle time and actuation
-metrics = ["avg_flow_rate", "avg_density", "avg_inter_distance"]
-metric_titles = ["Flow Rate (veh/hr)", "Density (veh/km)", "Inter-Vehicular Distance (m)"]
-
-for metric, title in zip(metrics, metric_titles):
-    plt.figure(figsize=(12, 6))
-    sns.barplot(x="Traffic Light Cycle Time", y=metric, hue="Signal Actuation", data=summary_df)
-    plt.title(f"Effect of Traffic Light Cycle Time and Signal Actuation on {title}")
-    plt.xlabel("Traffic Light Cycle Time (s)")
-    plt.ylabel(title)
-    plt.legend(title="Signal Actuation")
-    plt.savefig(f"sumo_{metric}_analysis.png")
-    plt.show()
-
-# Exploring AM vs PM vs Night traffic for different TLS timings
-for metric, title in zip(metrics, metric_titles):
-    plt.figure(figsize=(12, 6))
-    sns.barplot(x="Traffic Light Cycle Time", y=metric, hue="Time of Day", data=summary_df)
-    plt.title(f"Comparison of AM, PM, and Night Traffic for {title}")
-    plt.xlabel("Traffic Light Cycle Time (s)")
-    plt.ylabel(title)
-    plt.legend(title="Time of Day")
-    plt.savefig(f"sumo_{metric}_time_comparison.png")
-    plt.show()
-
-# Save separate summary files
-for time_of_day in df["Time of Day"].unique():
-    filtered_df = summary_df[summary_df["Time of Day"] == time_of_day]
-    filtered_df.to_csv(f"sumo_analysis_{time_of_day}.csv", index=False)
+
+def cached_summary(data_file, cache_dir=SUMMARY_CACHE_DIR):
+    """(data, summary) of data_file, the summary reused from the cache when the file's bytes are unchanged"""
+    instrumentation.count_bytes(data_file)
+    cache_file = derived_cache_file(cache_dir, data_file, SUMMARY_VERSION, ".pkl")
+
+    with instrumentation.stage("load"):
+        df = load_data(data_file)
+    if os.path.exists(cache_file):
+        instrumentation.count("summary_cache_hits")
+        return df, pd.read_pickle(cache_file)
+
+    with instrumentation.stage("summarize"):
+        summary_df = summarize_data(df)
+    with atomic_output(cache_file) as tmp_file:
+        summary_df.to_pickle(tmp_file)
+    return df, summary_df
+
+
+def barplot(summary_df, metric, hue, ax=None):
+    """Bars of metric by cycle time, with the replication CIs as error bars when available"""
+    ax = ax or plt.gca()
+    ci_column = f"{metric}_ci"
+    if ci_column not in summary_df or summary_df[ci_column].isna().all():
+        sns.barplot(x="Traffic Light Cycle Time", y=metric, hue=hue, data=summary_df, ax=ax)
+        return
+
+    grouped = summary_df.groupby(["Traffic Light Cycle Time", hue], observed=True)
+    means = grouped[metric].mean().unstack()
+    errors = grouped[ci_column].apply(combine_ci).unstack()
+    means.plot.bar(yerr=errors, capsize=4, rot=0, ax=ax)
+
+
+def plot_metric(summary_df, metric, hue, ax):
+    """One bar chart of the report, titled and labelled"""
+    title = METRIC_TITLES[metric]
+    barplot(summary_df, metric, hue, ax)
+    ax.set_title(GROUPINGS[hue][1].format(title=title))
+    ax.set_xlabel("Traffic Light Cycle Time (s)")
+    ax.set_ylabel(title)
+    ax.legend(title=hue)
+
+
+def plot_panel(summary_df):
+    """Every metric x grouping on one page: a row per metric, a column per grouping"""
+    fig, axes = plt.subplots(len(METRIC_TITLES), len(GROUPINGS), figsize=(9 * len(GROUPINGS), 5 * len(METRIC_TITLES)),
+                             squeeze=False)
+    for row, metric in zip(axes, METRIC_TITLES):
+        for ax, hue in zip(row, GROUPINGS):
+            plot_metric(summary_df, metric, hue, ax)
+            ax.title.set_fontsize("medium")
+    fig.tight_layout()
+    return fig
+
+
+def plot_trajectories(series_files, metric, title, period=TRAJECTORY_PERIOD):
+    """One panel per direction, one line per run, from the <name>_ts.npz files of --time-series"""
+    fig, axes = plt.subplots(2, 2, figsize=(14, 8), sharex=True)
+    for file in series_files:
+        series = resample_series(load_time_series(file), period)
+        run = os.path.basename(file)[:-len("_ts.npz")]
+        for ax, direction, values in zip(axes.flat, series["directions"], series[metric]):
+            ax.plot(series["time"] / 60, values, label=run, linewidth=1)
+            ax.set_title(direction)
+    for ax in axes[-1]:
+        ax.set_xlabel("Simulation time (min)")
+    for ax in axes[:, 0]:
+        ax.set_ylabel(title)
+    axes.flat[0].legend(fontsize="small", ncol=2)
+    fig.suptitle(f"{title} over time, {period // 60}-minute averages")
+    fig.tight_layout()
+    return fig
+
+
+def figure_specs(panel=False, series_files=()):
+    """(output file, kind, arguments) of every figure of the report"""
+    specs = []
+    if panel:
+        specs.append(("sumo_report.png", "panel", ()))
+    else:
+        for hue, (suffix, _) in GROUPINGS.items():
+            for metric in METRIC_TITLES:
+                specs.append((f"sumo_{metric}_{suffix}.png", "metric", (metric, hue)))
+    if series_files:
+        for metric, title in TRAJECTORY_TITLES.items():
+            specs.append((f"sumo_{metric}_trajectories.png", "trajectories", (list(series_files), metric, title)))
+    return specs
+
+
+def render(spec, summary_df, headless=True):
+    """Draw and save one figure; in headless mode it is closed right after saving"""
+    if headless:
+        matplotlib.use("Agg")
+    output_file, kind, args = spec
+    if kind == "panel":
+        fig = plot_panel(summary_df)
+    elif kind == "metric":
+        fig, ax = plt.subplots(figsize=(12, 6))
+        plot_metric(summary_df, *args, ax)
+    else:
+        fig = plot_trajectories(*args)
+    fig.savefig(output_file)
+    if headless:
+        plt.close(fig)
+    return output_file
+
+
+def render_all(specs, summary_df, workers=None):
+    """Render the figures headless, in parallel worker processes"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render, specs, [summary_df] * len(specs)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize final_data.csv and plot the sweep results.")
+    parser.add_argument("--data", default="final_data.csv", help="aggregated CSV from dataOrganizer.py")
+    parser.add_argument("--db", help="query the SQLite results database from run_sweep.py --db instead of --data")
+    parser.add_argument("--where", help="with --db, SQL condition over runs r and metrics m, "
+                                        "e.g. \"m.direction = 'Westbound' AND r.created_at >= '2026-09-01'\"")
+    parser.add_argument("--history", action="store_true",
+                        help="with --db, also average earlier runs of a name and seed, not only the latest")
+    parser.add_argument("--report", action="store_true",
+                        help="headless batch mode: Agg backend, figures rendered in parallel, nothing shown")
+    parser.add_argument("--panel", action="store_true", help="all metrics x groupings in one sumo_report.png")
+    parser.add_argument("--workers", type=int, help="processes rendering figures in --report mode (default: all cores)")
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    instrumentation.enable(args.profile)  # or LYONS_PROFILE=1; writes final_data_analysis.timing.json
+    if args.report:
+        matplotlib.use("Agg")
+
+    if args.db:
+        # The database aggregates in SQL, no CSV to load or summary to cache
+        with instrumentation.stage("query"):
+            summary_df = query_summary(args.db, args.where, history=args.history)
+        times_of_day = summary_df["Time of Day"].unique()
+    else:
+        df, summary_df = cached_summary(args.data)
+        times_of_day = df["Time of Day"].unique()
+    summary_df.to_csv("sumo_analysis_summary.csv", index=False)
+    print(summary_df)
+
+    # Save separate summary files
+    for time_of_day in times_of_day:
+        filtered_df = summary_df[summary_df["Time of Day"] == time_of_day]
+        filtered_df.to_csv(f"sumo_analysis_{time_of_day}.csv", index=False)
+
+    # Per-interval trajectories of every run extracted with --time-series
+    series_files = sorted(glob.glob("*_ts.npz"))
+    specs = figure_specs(args.panel, series_files)
+
+    with instrumentation.stage("plot"):
+        if args.report:
+            render_all(specs, summary_df, args.workers)
+        else:
+            for spec in specs:
+                render(spec, summary_df, headless=False)
+    instrumentation.count("figures", len(specs))
+    print(f"Saved {len(specs)} figure(s)")
+
+    instrumentation.write_report("final_data_analysis.timing.json", "final_data_analysis")
+    if not args.report:
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
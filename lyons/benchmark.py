@@ -0,0 +1,365 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "Data")
+sys.path.insert(0, DATA_DIR)  # dataOrganizer.py lives next to the CSVs
+
+from dataOrganizer import process_csv_files
+from extract_traffic_data import match_run_csv, parse_detector_output, run_tables
+from filter_traffic import AM_EDGES, filter_trips_with_reduction
+from instrumentation import _peak_rss_mb
+from route_io import _start_tag
+from route_sorter import sort_route_file
+from sharded_parse import load_tripinfo_sharded, parse_detector_output_sharded
+from tripinfo_table import load_tripinfo, summarize_trips
+
+# Committed outputs the synthetic files are scaled up from
+TEMPLATES = {
+    "detector": os.path.join(BASE_DIR, "AM", "detector_output.xml"),
+    "tripinfo": os.path.join(BASE_DIR, "AM", "tripinfo.xml"),
+    "routes": os.path.join(BASE_DIR, "AM", "lyons_AM.rou.xml"),
+}
+
+FIXTURE_DIR = os.path.join(BASE_DIR, ".bench")
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmark_baseline.json")
+DEFAULT_SCALES = [10, 100, 1000]
+
+# Attributes shifted by one template horizon per copy, and attributes jittered
+TIME_ATTRIBUTES = {"begin", "end", "depart", "arrival"}
+JITTER_ATTRIBUTES = {"flow", "occupancy", "speed", "harmonicMeanSpeed", "duration", "waitingTime", "timeLoss"}
+
+# The sharded stages shard every fixture, however small and however many cores,
+# so they time the pool itself rather than the serial fallback
+SHARDED_WORKERS = max(2, os.cpu_count() or 1)
+
+
+def read_template(template_file, tag):
+    """Root tag and attributes plus the attribute dicts of every <tag> record of a SUMO output"""
+    context = ET.iterparse(template_file, events=("start", "end"))
+    _, root = next(context)
+    root_tag, root_attrib = root.tag, dict(root.attrib)
+    records = []
+    for event, elem in context:
+        if event == "end" and elem.tag == tag:
+            records.append(dict(elem.attrib))
+            root.clear()
+    return root_tag, root_attrib, records
+
+
+def template_horizon(records):
+    """Time span covered by the template, the offset between two copies"""
+    ends = [float(record.get(name)) for record in records for name in ("end", "arrival", "depart") if name in record]
+    return max(ends) + 1 if ends else 0.0
+
+
+def _format_value(name, value, offset, rng):
+    if name in TIME_ATTRIBUTES:
+        return f"{float(value) + offset:.2f}"
+    if name in JITTER_ATTRIBUTES and float(value) > 0:
+        return f"{float(value) * rng.uniform(0.9, 1.1):.2f}"
+    return value
+
+
+def generate_scaled(template_file, tag, output_file, scale, unique_ids=True, seed=0):
+    """Write scale copies of a SUMO output, each shifted by the template's horizon
+
+    Record layout, attribute order and the root element are kept, so the
+    result parses like the real thing. Times move forward one horizon per
+    copy, measured quantities get a seeded +/-10% jitter and, for trips, ids
+    get a copy suffix so they stay unique. Returns the number of records.
+    """
+    root_tag, root_attrib, records = read_template(template_file, tag)
+    horizon = template_horizon(records)
+    rng = random.Random(seed)
+
+    written = 0
+    with open(output_file, "w", encoding="utf-8") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n\n')
+        file.write(_start_tag(root_tag, root_attrib) + "\n")
+        for copy in range(scale):
+            offset = copy * horizon
+            for record in records:
+                values = []
+                for name, value in record.items():
+                    if name == "id" and unique_ids and copy:
+                        value = f"{value}_{copy}"
+                    else:
+                        value = _format_value(name, value, offset, rng)
+                    values.append(f'{name}="{value}"')
+                file.write(f"    <{tag} {' '.join(values)}/>\n")
+                written += 1
+        file.write(f"</{root_tag}>\n")
+    return written
+
+
+def generate_run_csvs(output_dir, scale, source_dir=DATA_DIR):
+    """scale copies of the committed run CSVs, each copy under its own cycle times"""
+    os.makedirs(output_dir, exist_ok=True)
+    sources = [(name, match_run_csv(name)) for name in sorted(os.listdir(source_dir)) if name.endswith(".csv")]
+    sources = [(name, match) for name, match in sources if match and match["seed"] is None]
+    for copy in range(scale):
+        for name, match in sources:
+            cycle = int(match["cycle_time"]) + 1000 * copy
+            shutil.copyfile(os.path.join(source_dir, name),
+                            os.path.join(output_dir, f"{match['label']}_{cycle}_SA{match['actuated']}.csv"))
+    return scale * len(sources)
+
+
+def fixture_paths(scale):
+    scale_dir = os.path.join(FIXTURE_DIR, f"x{scale}")
+    return {
+        "dir": scale_dir,
+        "detector": os.path.join(scale_dir, "detector_output.xml"),
+        "tripinfo": os.path.join(scale_dir, "tripinfo.xml"),
+        "routes": os.path.join(scale_dir, "routes.rou.xml"),
+        "csvs": os.path.join(scale_dir, "csvs"),
+    }
+
+
+def ensure_fixtures(scale, regenerate=False):
+    """Generate the synthetic files for a scale unless they already exist"""
+    paths = fixture_paths(scale)
+    if regenerate:
+        shutil.rmtree(paths["dir"], ignore_errors=True)
+    os.makedirs(paths["dir"], exist_ok=True)
+
+    for name, tag, unique_ids in (("detector", "interval", False), ("tripinfo", "tripinfo", True),
+                                  ("routes", "trip", True)):
+        if not os.path.exists(paths[name]):
+            tmp_file = paths[name] + ".tmp"
+            count = generate_scaled(TEMPLATES[name], tag, tmp_file, scale, unique_ids)
+            os.replace(tmp_file, paths[name])
+            print(f"🛠️ Generated {os.path.relpath(paths[name])} ({count} records)")
+    if not os.path.isdir(paths["csvs"]):
+        generate_run_csvs(paths["csvs"] + ".tmp", scale)
+        os.replace(paths["csvs"] + ".tmp", paths["csvs"])
+    return paths
+
+
+def count_records(file, tag):
+    with open(file, encoding="utf-8") as lines:
+        return sum(1 for line in lines if f"<{tag} " in line)
+
+
+def template_tables():
+    """Lane tables of the AM scenario the fixtures come from, with every lane's heading"""
+    return run_tables(os.path.dirname(TEMPLATES["detector"]))
+
+
+# Benchmark stages: each takes the fixture paths and a scratch directory and
+# returns (setup, timed call) so only the call is measured. The call returns
+# the number of records it processed. Lane tables are built before the call,
+# so the parse stages do not time indexing the net.
+
+def stage_detector(paths, scratch):
+    records = count_records(paths["detector"], "interval")
+    tables = template_tables()
+
+    def run():
+        parse_detector_output(paths["detector"], tables)
+        return records
+    return None, run
+
+
+def stage_tripinfo(paths, scratch):
+    tables = template_tables()
+
+    def run():
+        table = load_tripinfo(paths["tripinfo"], tables)
+        summarize_trips(table)
+        return len(table)
+    return None, run
+
+
+def stage_detector_sharded(paths, scratch):
+    records = count_records(paths["detector"], "interval")
+    tables = template_tables()
+
+    def run():
+        parse_detector_output_sharded(paths["detector"], tables, workers=SHARDED_WORKERS, min_bytes=0)
+        return records
+    return None, run
+
+
+def stage_tripinfo_sharded(paths, scratch):
+    tables = template_tables()
+
+    def run():
+        table = load_tripinfo_sharded(paths["tripinfo"], tables, workers=SHARDED_WORKERS, min_bytes=0)
+        summarize_trips(table)
+        return len(table)
+    return None, run
+
+
+def stage_filter(paths, scratch):
+    records = count_records(paths["routes"], "trip")
+
+    def run():
+        filter_trips_with_reduction(paths["routes"], os.path.join(scratch, "filtered.rou.xml"), AM_EDGES, seed=0)
+        return records
+    return None, run
+
+
+def stage_sort(paths, scratch):
+    def run():
+        return sort_route_file(paths["routes"], os.path.join(scratch, "sorted.rou.xml"))
+    return None, run
+
+
+def stage_aggregate(paths, scratch):
+    csv_dir = os.path.join(scratch, "csvs")
+    runs = len(os.listdir(paths["csvs"]))
+
+    def setup():
+        shutil.copytree(paths["csvs"], csv_dir)
+
+    def run():
+        process_csv_files(csv_dir, "final_data.csv")
+        return runs
+    return setup, run
+
+
+def stage_aggregate_incremental(paths, scratch):
+    """Adding one run to an already aggregated directory"""
+    csv_dir = os.path.join(scratch, "csvs")
+
+    def setup():
+        shutil.copytree(paths["csvs"], csv_dir)
+        process_csv_files(csv_dir, "final_data.csv")
+        shutil.copyfile(os.path.join(DATA_DIR, "AM_70_SAtrue.csv"), os.path.join(csv_dir, "AM_1_SAtrue.csv"))
+
+    def run():
+        process_csv_files(csv_dir, "final_data.csv")
+        return 1
+    return setup, run
+
+
+STAGES = {
+    "detector": stage_detector,
+    "tripinfo": stage_tripinfo,
+    "detector_sharded": stage_detector_sharded,
+    "tripinfo_sharded": stage_tripinfo_sharded,
+    "filter": stage_filter,
+    "sort": stage_sort,
+    "aggregate": stage_aggregate,
+    "aggregate_incremental": stage_aggregate_incremental,
+}
+
+
+def _measure(stage, paths, scratch):
+    """Run one stage in this (fresh) process, return seconds, records, its peak RSS and its workers' peak RSS"""
+    os.makedirs(scratch, exist_ok=True)
+    try:
+        setup, run = STAGES[stage](paths, scratch)
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        records = run()
+        seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    # The largest finished child is a shard worker of the sharded stages
+    return seconds, records, _peak_rss_mb(resource.RUSAGE_SELF), _peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+
+def benchmark_stage(stage, scale, repeat=3):
+    """Best-of-repeat time of a stage, each repetition in a new process so peak RSS is the stage's own"""
+    paths = fixture_paths(scale)
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for i in range(repeat):
+        scratch = os.path.join(paths["dir"], f"scratch_{stage}_{i}")
+        # Not a multiprocessing.Pool: its daemonic workers could not start the sharded stages' pools
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            runs.append(pool.submit(_measure, stage, paths, scratch).result())
+
+    seconds = min(run[0] for run in runs)
+    records = runs[0][1]
+    return {
+        "seconds": seconds,
+        "records": records,
+        "records_per_s": records / seconds if seconds > 0 else None,
+        "peak_rss_mb": max(run[2] for run in runs),
+        "workers_peak_rss_mb": max(run[3] for run in runs),
+    }
+
+
+def machine_info():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def load_baseline(baseline_file):
+    try:
+        with open(baseline_file) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Stages that got slower than the baseline by more than tolerance (relative)"""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get("results", {}).get(key)
+        if reference and result["seconds"] > reference["seconds"] * (1 + tolerance):
+            regressions.append((key, reference["seconds"], result["seconds"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the parsing and aggregation stages on synthetic SUMO outputs.")
+    parser.add_argument("--scales", nargs="+", type=int, default=DEFAULT_SCALES,
+                        help="sizes relative to the committed outputs (default: 10 100 1000)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per stage, the fastest counts")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON baseline to compare against or save")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the synthetic files")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in args.scales:
+        ensure_fixtures(scale, args.regenerate)
+        for stage in args.stages:
+            result = benchmark_stage(stage, scale, args.repeat)
+            results[f"{stage}@x{scale}"] = result
+            rate = f"{result['records_per_s']:,.0f} rec/s" if result["records_per_s"] else "-"
+            print(f"⏱️ {stage:<22} x{scale:<5} {result['seconds']:9.3f} s  {rate:>16}  "
+                  f"{result['peak_rss_mb']:8.1f} MB peak  {result['workers_peak_rss_mb']:8.1f} MB workers")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump({"machine": machine_info(), "results": results}, file, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    if baseline.get("machine") != machine_info():
+        print("⚠️ Baseline was recorded on a different machine, timings may not be comparable")
+
+    regressions = compare(results, baseline, args.tolerance)
+    for key, before, after in regressions:
+        print(f"❌ {key} regressed: {before:.3f} s -> {after:.3f} s")
+    if not regressions:
+        print("✅ No regressions against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import gzip
+import io
+import os
+
+# Leading bytes of each supported container; anything else is read as plain text
+MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+EXTENSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+# Level 6 is gzip's usual trade-off; 9 is several times slower for a few percent
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _zstandard():
+    # zstd support is optional, gzip covers what SUMO itself can write
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstandard is needed for .zst files: `pip install zstandard`") from None
+    return zstandard
+
+
+def detect_compression(path):
+    """'gzip', 'zstd' or None, from the first bytes of the file rather than its name"""
+    with open(path, "rb") as file:
+        head = file.read(4)
+    for compression, magic in MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def compression_for(path):
+    """Compression implied by an output file's extension, e.g. tripinfo.xml.gz -> 'gzip'"""
+    return EXTENSIONS.get(os.path.splitext(path)[1])
+
+
+def open_input(path, mode="rb"):
+    """Open a plain, gzip or zstd file for streaming reads, whatever its name says
+
+    mode is "rb" or "rt"; text is UTF-8.
+    """
+    compression = detect_compression(path)
+    if compression == "gzip":
+        stream = gzip.open(path, "rb")
+    elif compression == "zstd":
+        stream = _zstandard().ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    else:
+        stream = open(path, "rb")
+    return io.TextIOWrapper(stream, encoding="utf-8") if mode == "rt" else stream
+
+
+def open_output(path, mode="wt", compression=None):
+    """Open path for streaming writes, compressed as its extension says unless compression is given
+
+    mode is "wt", "at", "wb" or "ab"; appending to a compressed file adds a
+    new gzip member or zstd frame, which readers see as one stream.
+    """
+    compression = compression or compression_for(path)
+    binary_mode = mode.replace("t", "") if "b" in mode else mode.replace("t", "") + "b"
+    if compression == "gzip":
+        stream = gzip.open(path, binary_mode, compresslevel=GZIP_LEVEL)
+    elif compression == "zstd":
+        compressor = _zstandard().ZstdCompressor(level=ZSTD_LEVEL)
+        stream = compressor.stream_writer(open(path, binary_mode), closefd=True)
+    else:
+        stream = open(path, binary_mode)
+    return stream if "b" in mode else io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+
+def existing_output(path):
+    """path, or its .gz/.zst variant when only that one exists (e.g. tripinfo.xml.gz)"""
+    for candidate in [path] + [path + extension for extension in EXTENSIONS]:
+        if os.path.exists(candidate):
+            return candidate
+    return path
@@ -0,0 +1,99 @@
+import math
+
+from extract_traffic_data import DEFAULT_TABLES
+
+# Normal quantile for a two-sided 95% confidence interval
+Z_95 = 1.959963984540054
+
+# Student t quantiles for a two-sided 95% interval, by degrees of freedom
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+        11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093,
+        20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+
+
+def t_quantile_95(df):
+    """Two-sided 95% t quantile, using the nearest tabulated df at or below df"""
+    if df < 1:
+        return math.inf
+    return T_95[max(key for key in T_95 if key <= df)] if df <= 120 else Z_95
+
+
+class RunningStats:
+    """Welford's online mean and variance, O(1) memory per series"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def ci_halfwidth(self, z=None):
+        """Half-width of the confidence interval of the mean
+
+        Uses the given normal quantile, or the 95% t quantile for n - 1
+        degrees of freedom when z is None (the right choice for a handful of
+        replications).
+        """
+        if self.n < 2:
+            return math.inf
+        if z is None:
+            z = t_quantile_95(self.n - 1)
+        return z * math.sqrt(self.variance / self.n)
+
+
+class ConvergenceMonitor:
+    """Decide when every direction's running flow and density means have settled
+
+    Fed with detector intervals as they are produced (see
+    traci_collector.collect's on_interval). A direction has converged once it
+    has at least min_intervals intervals and the confidence interval of both
+    its mean flow and mean density is within tolerance (relative, e.g. 0.05
+    for +/-5%) of the mean. Calling the monitor returns True once every
+    direction with detectors has converged, which stops the run.
+    """
+
+    def __init__(self, tables=DEFAULT_TABLES, tolerance=0.05, min_intervals=10, z=Z_95):
+        self.tables = tables
+        self.tolerance = tolerance
+        self.min_intervals = min_intervals
+        self.z = z
+        self.stats = {direction: {"flow": RunningStats(), "density": RunningStats()}
+                      for direction, detectors in tables["groups"].items() if detectors}
+        self.stop_time = None
+
+    def direction_converged(self, direction):
+        for stats in self.stats[direction].values():
+            if stats.n < self.min_intervals:
+                return False
+            if stats.ci_halfwidth(self.z) > self.tolerance * abs(stats.mean):
+                return False
+        return True
+
+    def converged(self):
+        return all(self.direction_converged(direction) for direction in self.stats)
+
+    def __call__(self, detector_id, begin, end, flow, occupancy):
+        direction = self.tables["directions"].get(detector_id)
+        if direction is None:
+            return False
+
+        density = (occupancy / 100) * (1000 / self.tables["lengths"][detector_id])
+        self.stats[direction]["flow"].add(flow)
+        self.stats[direction]["density"].add(density)
+
+        if self.stop_time is None and self.converged():
+            self.stop_time = end
+        return self.stop_time is not None
@@ -0,0 +1,218 @@
+import argparse
+import os
+import xml.etree.ElementTree as ET
+from array import array
+
+import numpy as np
+
+from compressed_io import open_input
+from result_cache import atomic_output, derived_cache_file
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EDGE_CACHE_DIR = os.path.join(BASE_DIR, ".edge_cache")
+# Layout of the cached arrays, see result_cache.derived_cache_file
+EDGE_CACHE_VERSION = 1
+
+# Attributes of SUMO's edgeData <edge> records kept per edge and interval
+EDGE_METRICS = ["sampledSeconds", "density", "occupancy", "speed", "timeLoss", "waitingTime", "entered", "left"]
+
+# Interval length of the edgeData output written by the sweep (s)
+DEFAULT_EDGE_PERIOD = 300
+
+
+def write_edge_data_definition(destination, output_file="edge_output.xml", period=DEFAULT_EDGE_PERIOD):
+    """Additional file asking SUMO for edge mean data over every edge, one record per period"""
+    root = ET.Element("additional")
+    ET.SubElement(root, "edgeData", id="edges", file=output_file, period=str(period))
+    ET.ElementTree(root).write(destination)
+    return destination
+
+
+def _fill_value(name):
+    # Edges without traffic in an interval count as 0, except speed which is unknown
+    return np.nan if name == "speed" else 0.0
+
+
+def _grow(dense, rows, cols):
+    """dense enlarged, by doubling, to hold at least rows x cols"""
+    shape = next(iter(dense.values())).shape
+    if rows <= shape[0] and cols <= shape[1]:
+        return dense
+    grown = {}
+    for name, values in dense.items():
+        grown[name] = np.full((max(rows, 2 * shape[0]) if rows > shape[0] else shape[0],
+                               max(cols, 2 * shape[1]) if cols > shape[1] else shape[1]),
+                              _fill_value(name), dtype=np.float32)
+        grown[name][:values.shape[0], :values.shape[1]] = values
+    return grown
+
+
+def read_edge_data(file):
+    """Stream an edgeData output into edges x intervals float32 arrays
+
+    The records of one interval are buffered as typed columns and scattered
+    into the dense arrays when the interval ends, and the arrays grow by
+    doubling as new edges and intervals appear, so memory stays a small
+    multiple of the result however long the run. Edges without traffic in an
+    interval are not written by SUMO: they count as 0, except speed which is NaN.
+    """
+    begins = []
+    edge_codes = {}
+    dense = {name: np.full((64, 16), _fill_value(name), dtype=np.float32) for name in EDGE_METRICS}
+    columns = {name: array("f") for name in EDGE_METRICS}
+    codes = array("i")
+
+    with open_input(file) as stream:
+        context = ET.iterparse(stream, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event == "start":
+                if elem.tag == "interval":
+                    begins.append(float(elem.get("begin")))
+                continue
+            if elem.tag == "edge":
+                edge_id = elem.get("id")
+                if edge_id.startswith(":"):
+                    continue
+                get = elem.get
+                codes.append(edge_codes.setdefault(edge_id, len(edge_codes)))
+                for name in EDGE_METRICS:
+                    columns[name].append(float(get(name, _fill_value(name))))
+            elif elem.tag == "interval":
+                step = len(begins) - 1
+                dense = _grow(dense, len(edge_codes), step + 1)
+                rows = np.frombuffer(codes, dtype=np.int32)
+                for name, values in columns.items():
+                    dense[name][rows, step] = np.frombuffer(values, dtype=np.float32)
+                columns = {name: array("f") for name in EDGE_METRICS}
+                codes = array("i")
+                root.clear()
+
+    data = {
+        "edges": np.array(list(edge_codes), dtype=str),
+        "begin": np.array(begins),
+        "period": np.float64(begins[1] - begins[0] if len(begins) > 1 else 0.0),
+    }
+    for name, values in dense.items():
+        data[name] = np.ascontiguousarray(values[:len(edge_codes), :len(begins)])
+    return data
+
+
+def write_edge_data(output_file, data):
+    np.savez(output_file, **data)
+    return output_file
+
+
+def load_edge_arrays(file):
+    """Edge arrays saved by write_edge_data"""
+    with np.load(file, allow_pickle=False) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def load_edge_data(file, cache_dir=EDGE_CACHE_DIR):
+    """Edge arrays of an edgeData output (or a saved .npz), cached on disk by the file's sha256
+
+    Comparing scenarios again later reads the cached arrays instead of re-parsing the XML.
+    """
+    if file.endswith(".npz"):
+        return load_edge_arrays(file)
+    cache_file = derived_cache_file(cache_dir, file, EDGE_CACHE_VERSION, ".npz")
+    if os.path.exists(cache_file):
+        return load_edge_arrays(cache_file)
+
+    data = read_edge_data(file)
+    with atomic_output(cache_file) as tmp_file:
+        write_edge_data(tmp_file, data)
+    return data
+
+
+def edge_summary(data):
+    """Per-edge delay (vehicle-hours), mean/peak density and traffic-weighted mean speed"""
+    import pandas as pd
+
+    sampled = data["sampledSeconds"].astype(np.float64)
+    density = data["density"].astype(np.float64)
+    vehicle_seconds = sampled.sum(axis=1)
+    weighted_speed = np.nansum(np.nan_to_num(data["speed"]) * sampled, axis=1)
+    peak = density.argmax(axis=1) if density.shape[1] else np.zeros(len(density), dtype=int)
+
+    summary = pd.DataFrame({
+        "delay_veh_hours": data["timeLoss"].astype(np.float64).sum(axis=1) / 3600,
+        "waiting_veh_hours": data["waitingTime"].astype(np.float64).sum(axis=1) / 3600,
+        "vehicle_hours": vehicle_seconds / 3600,
+        "mean_density": density.mean(axis=1) if density.shape[1] else 0.0,
+        "peak_density": density.max(axis=1) if density.shape[1] else 0.0,
+        "peak_time": data["begin"][peak] if len(data["begin"]) else np.nan,
+        "mean_speed": np.divide(weighted_speed, vehicle_seconds, out=np.full(len(sampled), np.nan),
+                                where=vehicle_seconds > 0),
+    }, index=pd.Index(data["edges"], name="edge"))
+    return summary
+
+
+def total_delay_hours(data):
+    """Vehicle-hours lost to congestion over the whole network and run"""
+    return float(data["timeLoss"].astype(np.float64).sum() / 3600)
+
+
+def hotspots(data, top=20, by="delay_veh_hours"):
+    """The top edges by delay (or any edge_summary column), worst first"""
+    return edge_summary(data).sort_values(by, ascending=False).head(top)
+
+
+def edge_difference(static, actuated):
+    """Per-edge actuated minus static delay and mean density, largest change first
+
+    Edges used in only one of the runs count as having no delay and density in the other.
+    """
+    import pandas as pd
+
+    columns = ["delay_veh_hours", "mean_density"]
+    before = edge_summary(static)[columns]
+    after = edge_summary(actuated)[columns]
+    edges = before.index.union(after.index)
+    before = before.reindex(edges, fill_value=0.0)
+    after = after.reindex(edges, fill_value=0.0)
+
+    difference = pd.concat({"static": before, "actuated": after, "change": after - before}, axis=1)
+    difference.columns = [f"{column}_{side}" for side, column in difference.columns]
+    order = difference["delay_veh_hours_change"].abs().sort_values(ascending=False).index
+    return difference.loc[order]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Edge-level congestion from SUMO edgeData output.")
+    parser.add_argument("--cache-dir", default=EDGE_CACHE_DIR, help="parsed edge arrays, keyed by the file's sha256")
+    commands = parser.add_subparsers(dest="command", required=True)
+    top = commands.add_parser("hotspots", help="worst edges of a run and its total vehicle-hours of delay")
+    top.add_argument("file", help="edge_output.xml(.gz) of a run, or its <name>_edges.npz")
+    top.add_argument("--top", type=int, default=20, help="edges to list")
+    top.add_argument("--by", default="delay_veh_hours", help="edge summary column to rank by, e.g. peak_density")
+    top.add_argument("--output", help="save the ranked edges as CSV")
+    compare = commands.add_parser("compare", help="per-edge actuated minus static delay and density")
+    compare.add_argument("static", help="edge output of the static run")
+    compare.add_argument("actuated", help="edge output of the actuated run")
+    compare.add_argument("--top", type=int, default=20, help="edges to print")
+    compare.add_argument("--output", help="save every edge's difference as CSV")
+    args = parser.parse_args(argv)
+
+    if args.command == "hotspots":
+        data = load_edge_data(args.file, args.cache_dir)
+        ranked = hotspots(data, args.top, args.by)
+        print(f"🚗 {len(data['edges'])} edges x {len(data['begin'])} intervals, "
+              f"{total_delay_hours(data):.1f} vehicle-hours of delay")
+        print(ranked.to_string())
+        if args.output:
+            ranked.to_csv(args.output)
+    else:
+        static = load_edge_data(args.static, args.cache_dir)
+        actuated = load_edge_data(args.actuated, args.cache_dir)
+        difference = edge_difference(static, actuated)
+        print(f"🚦 Delay: static {total_delay_hours(static):.1f} veh-h, actuated {total_delay_hours(actuated):.1f} veh-h")
+        print(difference.head(args.top).to_string())
+        if args.output:
+            difference.to_csv(args.output)
+
+
+if __name__ == "__main__":
+    main()
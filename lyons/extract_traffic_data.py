@@ -0,0 +1,303 @@
+import xml.etree.ElementTree as ET
+import argparse
+import os
+import csv
+import re
+
+import instrumentation
+from compressed_io import existing_output, open_input
+
+# Define the lanes for each direction
+LANE_GROUPS = {
+    "Northbound": ["nb_1", "nb_2"],
+    "Southbound": ["sb_1", "sb_2"],
+    "Eastbound": ["eb_1", "eb_2"],
+    "Westbound": ["wb_1", "wb_2"]
+}
+
+# Lane lengths (to calculate density properly)
+LANE_LENGTHS = {
+    "nb_1": 40, "nb_2": 40,
+    "sb_1": 40, "sb_2": 40,
+    "eb_1": 109, "eb_2": 109,
+    "wb_1": 109, "wb_2": 109
+}
+
+LANE_IDS = {
+    "nb_1": "-14026336#4_0", "nb_2": "-14026336#3_0",
+    "sb_1": "14026336#3_0", "sb_2": "14026336#4_0",
+    "eb_1": "683047946#5_0", "eb_2": "683047946#6_0",
+    "wb_1": "-683047946#6_0", "wb_2": "-683047946#5_0"
+}
+
+# Detector id -> direction, so each interval is routed with one dict lookup
+DETECTOR_DIRECTIONS = {lane_id: direction for direction, lanes in LANE_GROUPS.items() for lane_id in lanes}
+
+# Fallback lane tables when the net file of a run is not at hand, see network_index.lane_tables
+DEFAULT_TABLES = {"groups": LANE_GROUPS, "lengths": LANE_LENGTHS, "ids": LANE_IDS, "directions": DETECTOR_DIRECTIONS}
+
+# Scenario folder -> label used in the CSV file names (AM_110_SAtrue.csv, LT_70_SAfalse.csv, ...)
+SCENARIO_LABELS = {"AM": "AM", "PM": "PM", "low_traffic_flow": "LT"}
+
+# --resample choices, in seconds (see time_series.py)
+RESAMPLE_PERIODS = {"5min": 300, "15min": 900}
+
+CSV_HEADER = ["Direction", "Average Flow Rate (veh/hr)", "Average Density (veh/km)", "Average Inter-Vehicular Distance (m)"]
+
+# Extra columns of a cell averaged over several seeds
+REPLICATION_HEADER = ["Replications",
+                      "Std Flow Rate (veh/hr)", "CI95 Flow Rate (veh/hr)",
+                      "Std Density (veh/km)", "CI95 Density (veh/km)",
+                      "Std Inter-Vehicular Distance (m)", "CI95 Inter-Vehicular Distance (m)"]
+METRICS = ["avg_flow", "avg_density", "avg_distance"]
+
+
+def new_direction_sums(tables=DEFAULT_TABLES):
+    """Empty running sums for every direction"""
+    return {direction: {"flow_sum": 0.0, "flow_count": 0, "density_sum": 0.0, "density_count": 0,
+                        "inverse_density": 0.0, "zero_density": 0}
+            for direction in tables["groups"]}
+
+
+def add_interval(data, detector_id, flow, occupancy, tables=DEFAULT_TABLES):
+    """Fold one detector interval into the running sums of its direction"""
+    direction = tables["directions"].get(detector_id)
+    if direction is None:
+        return
+
+    # Convert occupancy (%) to vehicle density (vehicles/km)
+    lane_length = tables["lengths"][detector_id]
+    density = (occupancy / 100) * (1000 / lane_length)
+
+    sums = data[direction]
+    sums["flow_sum"] += flow
+    sums["flow_count"] += 1
+    sums["density_sum"] += density
+    sums["density_count"] += 1
+    if density:
+        sums["inverse_density"] += 1 / density
+    else:
+        sums["zero_density"] += 1
+
+
+def summarize_direction_sums(data, tables=DEFAULT_TABLES):
+    """Turn running sums into avg_flow / avg_density / avg_distance per direction"""
+    results = {}
+    for direction, sums in data.items():
+        avg_flow = sums["flow_sum"] / sums["flow_count"] if sums["flow_count"] else 0
+        avg_density = sums["density_sum"] / sums["density_count"] if sums["density_count"] else 0
+        # Intervals with zero density have no defined spacing and are skipped
+        nonzero = sums["density_count"] - sums["zero_density"]
+        if nonzero:
+            spacing = tables["lengths"][tables["groups"][direction][0]] * 2
+            avg_distance = spacing * sums["inverse_density"] / nonzero
+        else:
+            avg_distance = 0
+        results[direction] = {"avg_flow": avg_flow, "avg_density": avg_density, "avg_distance": avg_distance}
+
+    return results
+
+
+def parse_detector_output(file, tables=DEFAULT_TABLES):
+    """Extract flow rate and density from detector_output.xml per lane
+
+    The file is streamed with iterparse and every interval is cleared once it
+    has been folded into running sums, so memory stays flat however long the
+    simulation ran.
+    """
+    data = new_direction_sums(tables)
+    instrumentation.count_bytes(file)
+
+    with open_input(file) as stream:
+        context = ET.iterparse(stream, events=("start", "end"))
+        _, root = next(context)
+
+        for event, elem in context:
+            if event != "end" or elem.tag != "interval":
+                continue
+
+            add_interval(data, elem.get("id"), float(elem.get("flow", 0)), float(elem.get("occupancy", 0)), tables)
+
+            # Drop the parsed interval so the tree never grows
+            root.clear()
+
+    instrumentation.count("intervals", sum(sums["flow_count"] for sums in data.values()))
+    return summarize_direction_sums(data, tables)
+
+
+def run_tables(directory):
+    """Lane tables derived from the net and detector files named in directory's simple.sumocfg
+
+    Falls back to the hand-written constants when the config or its net file
+    is not available.
+    """
+    config_file = os.path.join(directory, "simple.sumocfg")
+    if os.path.exists(config_file):
+        inputs = ET.parse(config_file).getroot().find("input")
+        net_file = os.path.join(directory, inputs.find("net-file").get("value"))
+        # The detector file is the first of a comma-separated list (signal overlays follow it)
+        additional_file = os.path.join(directory, inputs.find("additional-files").get("value").split(",")[0].strip())
+        if os.path.exists(net_file) and os.path.exists(additional_file):
+            from network_index import lane_tables
+            return lane_tables(additional_file, net_file)
+
+    print(f"Note: no net file found for {directory}, using the built-in lane tables.")
+    return DEFAULT_TABLES
+
+
+def scenario_label(directory):
+    """Label for a scenario folder, e.g. low_traffic_flow -> LT"""
+    name = os.path.basename(os.path.normpath(directory))
+    return SCENARIO_LABELS.get(name, name)
+
+
+# Run names as written by output_csv_name, plus the _s<seed> suffix of one seed of a cell (see run_sweep.py)
+RUN_NAME = re.compile(r"^(?P<label>[A-Za-z]+)_(?P<cycle_time>\d+)_SA(?P<actuated>true|false)(_s(?P<seed>\d+))?$")
+# Extension of a run CSV, optionally compressed
+RUN_CSV_SUFFIX = re.compile(r"\.csv(\.gz|\.zst)?$")
+
+
+def output_csv_name(label, cycle_time, actuated):
+    """CSV file name for one data point, e.g. AM_110_SAtrue.csv"""
+    return f"{label}_{cycle_time}_SA{'true' if actuated else 'false'}.csv"
+
+
+def match_run_csv(filename):
+    """RUN_NAME match of a run CSV's file name (e.g. AM_110_SAtrue.csv.gz), None for any other file"""
+    if not RUN_CSV_SUFFIX.search(filename):
+        return None
+    return RUN_NAME.match(RUN_CSV_SUFFIX.sub("", filename))
+
+
+def write_traffic_csv(results, output_csv, stats=None):
+    """Write the per-direction averages in the layout the Data/ scripts expect
+
+    stats, when given, maps direction -> metric -> running statistics over
+    replications (see convergence.RunningStats); the averages then come from
+    those and the std-dev and 95% CI columns are added.
+    """
+    with open(output_csv, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER + (REPLICATION_HEADER if stats is not None else []))
+
+        for direction in (stats if stats is not None else results):
+            if stats is not None:
+                metrics = stats[direction]
+                row = [direction] + [metrics[name].mean for name in METRICS]
+                row.append(metrics[METRICS[0]].n)
+                for name in METRICS:
+                    row += [metrics[name].std, metrics[name].ci_halfwidth()]
+                writer.writerow(row)
+                continue
+
+            avg_flow = results.get(direction, {}).get("avg_flow", 0)
+            avg_density = results.get(direction, {}).get("avg_density", 0)
+            avg_distance = results.get(direction, {}).get("avg_distance", 0)
+
+            writer.writerow([direction, avg_flow, avg_density, avg_distance])
+
+
+def extract_and_save_traffic_data(directory, cycle_time, actuated, label=None, output_dir=None, trips=False,
+                                  archive=False, parse_workers=1, time_series=False, resample=None):
+    """Parse the SUMO outputs in directory and save one CSV data point
+
+    With trips=True the per-direction delay, travel time and throughput from
+    tripinfo.xml are saved alongside as <name>_trips.csv. With archive=True
+    every detector interval and trip record is kept in <name>_archive/ for later
+    analysis without re-parsing the XML. parse_workers > 1 splits large
+    outputs across that many processes (see sharded_parse). time_series=True
+    keeps the per-interval direction metrics in <name>_ts.npz, averaged over
+    resample seconds when given. Compressed outputs (detector_output.xml.gz,
+    tripinfo.xml.zst, ...) are read in place of missing plain ones.
+    """
+    detector_file = existing_output(os.path.join(directory, "detector_output.xml"))
+    tripinfo_file = existing_output(os.path.join(directory, "tripinfo.xml"))
+    label = label or scenario_label(directory)
+    output_csv = os.path.join(output_dir or directory, output_csv_name(label, cycle_time, actuated))
+
+    if not os.path.exists(detector_file) or not os.path.exists(tripinfo_file):
+        print(f"Error: Required output files not found in {directory}. Run the SUMO simulation first.")
+        return None
+
+    os.makedirs(os.path.dirname(output_csv) or ".", exist_ok=True)
+    instrumentation.reset()
+    with instrumentation.stage("lane_tables"):
+        tables = run_tables(directory)
+    with instrumentation.stage("detector_parse"):
+        if parse_workers > 1:
+            from sharded_parse import parse_detector_output_sharded
+            detector_results = parse_detector_output_sharded(detector_file, tables, parse_workers)
+        else:
+            detector_results = parse_detector_output(detector_file, tables)
+    with instrumentation.stage("write_csv"):
+        write_traffic_csv(detector_results, output_csv)
+
+    if trips:
+        # pandas is only needed for the trip table
+        from tripinfo_table import load_tripinfo, summarize_trips, write_trip_summary
+        # The vehroute output, when the run wrote one, tells which trips crossed the junction
+        routes_file = existing_output(os.path.join(directory, "vehroutes.xml"))
+        routes_file = routes_file if os.path.exists(routes_file) else None
+        if routes_file is None:
+            print(f"Note: no vehroutes.xml in {directory}, throughput counts every trip instead of the junction's.")
+        with instrumentation.stage("trip_parse"):
+            if parse_workers > 1:
+                from sharded_parse import load_tripinfo_sharded
+                trip_table = load_tripinfo_sharded(tripinfo_file, tables, parse_workers, routes_file)
+            else:
+                trip_table = load_tripinfo(tripinfo_file, tables, routes_file)
+        trips_csv = output_csv[:-len(".csv")] + "_trips.csv"
+        with instrumentation.stage("trip_summary"):
+            write_trip_summary(summarize_trips(trip_table), trips_csv)
+        print(f"Trip data saved to {trips_csv}")
+
+    if archive:
+        from run_archive import write_run_archive
+        archive_file = output_csv[:-len(".csv")] + "_archive"
+        with instrumentation.stage("archive"):
+            write_run_archive(archive_file, detector_file, tripinfo_file, tables)
+        print(f"Run archive saved to {archive_file}")
+
+    if time_series:
+        from time_series import detector_time_series, write_time_series
+        series_file = output_csv[:-len(".csv")] + "_ts.npz"
+        with instrumentation.stage("time_series"):
+            write_time_series(series_file, detector_time_series(detector_file, tables, resample))
+        print(f"Time series saved to {series_file}")
+
+    report_file = instrumentation.write_report(instrumentation.report_file_for(output_csv), "extract_traffic_data")
+    if report_file:
+        print(f"Timing report saved to {report_file}")
+
+    print(f"Traffic data saved to {output_csv}")
+    return output_csv
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract per-direction traffic data from SUMO result directories.")
+    parser.add_argument("directories", nargs="+", help="scenario/result directories holding detector_output.xml and tripinfo.xml")
+    parser.add_argument("--cycle", type=int, required=True, help="traffic light cycle time of the runs (70, 90, 110, ...)")
+    actuation = parser.add_mutually_exclusive_group()
+    actuation.add_argument("--actuated", dest="actuated", action="store_true", help="runs used actuated signals")
+    actuation.add_argument("--static", dest="actuated", action="store_false", help="runs used static signals (default)")
+    parser.add_argument("--label", help="label used in the CSV name instead of the directory name (AM, PM, LT)")
+    parser.add_argument("--output-dir", help="where to write the CSVs (default: each result directory)")
+    parser.add_argument("--trips", action="store_true", help="also summarize tripinfo.xml into <name>_trips.csv")
+    parser.add_argument("--archive", action="store_true", help="also keep every interval and trip record in <name>_archive/")
+    parser.add_argument("--time-series", action="store_true", help="also keep per-interval metrics in <name>_ts.npz")
+    parser.add_argument("--resample", choices=["5min", "15min"], help="average the time series over 5 or 15 minutes")
+    parser.add_argument("--parse-workers", type=int, default=1,
+                        help="processes used to parse large detector/tripinfo files (0 = all cores)")
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    instrumentation.enable(args.profile)
+
+    for directory in args.directories:
+        extract_and_save_traffic_data(directory, args.cycle, args.actuated, label=args.label,
+                                      output_dir=args.output_dir, trips=args.trips, archive=args.archive,
+                                      parse_workers=args.parse_workers or os.cpu_count(),
+                                      time_series=args.time_series, resample=RESAMPLE_PERIODS.get(args.resample))
+
+
+if __name__ == "__main__":
+    main()
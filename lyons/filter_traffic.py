@@ -1,6 +1,12 @@
-import xml.etree.ElementTree as ET
+import argparse
+import hashlib
+import json
+import os
 import random
 
+from route_io import RouteWriter, stream_routes
+from route_sorter import DEFAULT_CHUNK_SIZE, DepartSort
+
 # Define the edges for AM (east/north) and PM (south/west) traffic flow
 AM_EDGES = {
     "14027172#0", "-14026336#0", "-14026336#1", "14027172#1", "-14026336#1",  # Northbound
@@ -12,78 +18,220 @@ PM_EDGES = {
     "-683043808#0", "-683044783#6", "-683044783#5", "-683044783#4", "-683044783#3", "-683044783#2"  # Westbound
 }
 
+# Edge sets a manifest can refer to by name
+EDGE_SETS = {"AM": AM_EDGES, "PM": PM_EDGES}
 
-# Function to filter trips while keeping 50% of the trips going in the wrong direction
-def filter_trips_with_reduction(input_file, output_file, allowed_edges, reduction_percentage=50):
-    tree = ET.parse(input_file)
-    root = tree.getroot()
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MANIFEST = os.path.join(BASE_DIR, "demand_manifest.json")
 
-    trips = root.findall("trip")
-    wrong_direction_trips = [trip for trip in trips if trip.get("to") not in allowed_edges]
 
-    # Retain 50% of wrong-direction trips
-    keep_wrong_direction_trips = random.sample(wrong_direction_trips,
-                                               int(len(wrong_direction_trips) * (reduction_percentage / 100)))
+def keep_trip(trip_id, seed, percentage):
+    """Seeded, order-independent choice of whether to keep a trip
 
-    # Remove only the remaining 50% of wrong-direction trips
-    for trip in wrong_direction_trips:
-        if trip not in keep_wrong_direction_trips:
-            root.remove(trip)
+    The trip id is hashed with the seed, so the same seed keeps the same trips
+    whatever order they are read in, without remembering earlier trips.
+    """
+    digest = hashlib.blake2b(f"{seed}:{trip_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < (percentage / 100) * 2**64
 
-    tree.write(output_file)
 
+def resolve_seed(seed):
+    """Use the given seed, or draw one and print it so the run can be reproduced"""
+    if seed is None:
+        seed = random.randrange(2**32)
+        print(f"Using random seed {seed}")
+    return seed
 
-# Apply filtering for AM and PM while retaining 50% of wrong-direction trips
-filter_trips_with_reduction("lyons_AM.rou.xml", "lyons_AM.rou.xml", AM_EDGES, reduction_percentage=50)
-filter_trips_with_reduction("lyons_PM.rou.xml", "lyons_PM.rou.xml", PM_EDGES, reduction_percentage=50)
 
-print("✅ AM and PM traffic files updated: 50% of wrong-direction traffic retained.")
+# Pipeline stages: push() takes one element and returns the elements to pass
+# on, finish() returns whatever a stage still holds once the input ends.
 
+class DirectionFilter:
+    """Keep trips into allowed_edges and percentage % of the trips going in the wrong direction"""
 
-# Function to reduce traffic volume for night simulation
-def reduce_traffic(input_file, output_file, percentage=20):
-    tree = ET.parse(input_file)
-    root = tree.getroot()
+    def __init__(self, allowed_edges, percentage=50, seed=0):
+        self.allowed_edges = allowed_edges
+        self.percentage = percentage
+        self.seed = seed
+
+    def push(self, elem):
+        if elem.tag != "trip" or elem.get("to") in self.allowed_edges \
+                or keep_trip(elem.get("id"), self.seed, self.percentage):
+            return (elem,)
+        return ()
+
+    def finish(self):
+        return ()
+
+
+class VolumeReduction:
+    """Keep percentage % of all trips, e.g. for night traffic"""
+
+    def __init__(self, percentage=20, seed=0):
+        self.percentage = percentage
+        self.seed = seed
+
+    def push(self, elem):
+        if elem.tag != "trip" or keep_trip(elem.get("id"), self.seed, self.percentage):
+            return (elem,)
+        return ()
+
+    def finish(self):
+        return ()
+
+
+class TripCounter:
+    """Count the trips passing through, replacing a separate count_trips parse"""
+
+    def __init__(self):
+        self.trips = 0
+
+    def push(self, elem):
+        if elem.tag == "trip":
+            self.trips += 1
+        return (elem,)
+
+    def finish(self):
+        return ()
 
-    trips = root.findall("trip")
-    keep_trips = random.sample(trips, int(len(trips) * (percentage / 100)))
 
-    # Remove all trips and add back only the selected ones
-    for trip in trips:
-        root.remove(trip)
+def _push_through(stages, elems):
+    """Send elements through the remaining stages, yield what comes out of the last one"""
+    if not stages:
+        yield from elems
+        return
+    stage, rest = stages[0], stages[1:]
+    for elem in elems:
+        yield from _push_through(rest, stage.push(elem))
 
-    for trip in keep_trips:
-        root.append(trip)
 
-    tree.write(output_file)
+def _finish_stages(stages):
+    """Flush every stage in order, passing each one's leftovers through the stages after it"""
+    for i, stage in enumerate(stages):
+        yield from _push_through(stages[i + 1:], stage.finish())
 
 
-# Reduce the number of trips to 20% for night traffic
-reduce_traffic("lyons_Night.rou.xml", "lyons_Night.rou.xml", percentage=20)
+def run_variants(input_file, variants):
+    """Produce several route files from one streamed pass over input_file
 
-print("✅ Night traffic file created successfully.")
+    variants maps an output file to its list of stages. Returns output file ->
+    number of trips written. An output may not overwrite input_file: filtering
+    the filtered demand again would shrink it on every run.
+    """
+    for output_file in variants:
+        if os.path.realpath(output_file) == os.path.realpath(input_file):
+            raise ValueError(f"{output_file} is also the source, write the demand to another file")
+    root_tag, root_attrib, elements = stream_routes(input_file)
+
+    pipelines = {}
+    for output_file, stages in variants.items():
+        counter = TripCounter()
+        pipelines[output_file] = (list(stages) + [counter], counter,
+                                  RouteWriter(output_file, root_tag, root_attrib))
+
+    for elem in elements:
+        for stages, _, writer in pipelines.values():
+            for out in _push_through(stages, (elem,)):
+                writer.write(out)
+
+    counts = {}
+    for output_file, (stages, counter, writer) in pipelines.items():
+        for out in _finish_stages(stages):
+            writer.write(out)
+        writer.close()
+        counts[output_file] = counter.trips
+    return counts
+
+
+def run_pipeline(input_file, output_file, stages):
+    """Stream input_file through stages into output_file, return the number of trips written"""
+    return run_variants(input_file, {output_file: stages})[output_file]
+
+
+# Function to filter trips while keeping 50% of the trips going in the wrong direction
+def filter_trips_with_reduction(input_file, output_file, allowed_edges, reduction_percentage=50, seed=None):
+    stage = DirectionFilter(allowed_edges, reduction_percentage, resolve_seed(seed))
+    return run_pipeline(input_file, output_file, [stage])
+
+
+# Function to reduce traffic volume for night simulation
+def reduce_traffic(input_file, output_file, percentage=20, seed=None):
+    stage = VolumeReduction(percentage, resolve_seed(seed))
+    return run_pipeline(input_file, output_file, [stage])
 
 
 # Function to count the number of trips in a .rou.xml file
 def count_trips(file_path):
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        num_trips = len(root.findall("trip"))
-        return num_trips
+        _, _, elements = stream_routes(file_path)
+        return sum(1 for elem in elements if elem.tag == "trip")
     except FileNotFoundError:
         print(f"❌ Error: File {file_path} not found.")
         return None
-    except ET.ParseError:
+    except SyntaxError:
         print(f"❌ Error: Could not parse {file_path}. Ensure it is a valid XML file.")
         return None
 
 
-# Count trips in each file and print the results
-trip_files = ["lyons_AM.rou.xml", "lyons_PM.rou.xml", "lyons_Night.rou.xml"]
-trip_counts = {file: count_trips(file) for file in trip_files}
+def build_stage(spec, seed):
+    """Stage object for one manifest entry such as {"stage": "direction_filter", "edges": "AM"}"""
+    kind = spec["stage"]
+    if kind == "direction_filter":
+        edges = spec["edges"]
+        allowed_edges = EDGE_SETS[edges] if isinstance(edges, str) else set(edges)
+        return DirectionFilter(allowed_edges, spec.get("percentage", 50), seed)
+    if kind == "reduce":
+        return VolumeReduction(spec.get("percentage", 20), seed)
+    if kind == "sort":
+        return DepartSort(spec.get("chunk_size", DEFAULT_CHUNK_SIZE))
+    raise ValueError(f"Unknown pipeline stage '{kind}'")
+
+
+def generate_demand(manifest_file=DEFAULT_MANIFEST, seed=None, only=None):
+    """Produce every variant of the manifest, reading each source file once
+
+    Paths in the manifest are relative to the manifest file. Returns output
+    file -> number of trips.
+    """
+    seed = resolve_seed(seed)
+    with open(manifest_file) as file:
+        manifest = json.load(file)
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+
+    # Group variants by source so each source is parsed a single time
+    by_source = {}
+    for variant in manifest["variants"]:
+        if only and variant["name"] not in only:
+            continue
+        source = os.path.join(base_dir, variant["source"])
+        output = os.path.join(base_dir, variant["output"])
+        if not os.path.exists(source):
+            # The committed route files are outputs, already filtered
+            raise FileNotFoundError(f"{variant['name']}: unfiltered demand {source} not found")
+        by_source.setdefault(source, {})[output] = [build_stage(spec, seed) for spec in variant["stages"]]
+
+    counts = {}
+    for source, variants in by_source.items():
+        counts.update(run_variants(source, variants))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the AM/PM/Night demand variants listed in a manifest.")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="JSON manifest of variants to produce")
+    parser.add_argument("--seed", type=int, help="seed for trip sampling (default: drawn and printed)")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="only produce these variants")
+    args = parser.parse_args(argv)
+
+    try:
+        trip_counts = generate_demand(args.manifest, args.seed, args.only)
+    except (FileNotFoundError, ValueError) as error:
+        parser.error(str(error))
+
+    print("\n🚦 Traffic Statistics:")
+    for file, count in trip_counts.items():
+        print(f"✅ {os.path.relpath(file)}: {count} trips remaining.")
+
 
-print("\n🚦 Traffic Statistics:")
-for file, count in trip_counts.items():
-    if count is not None:
-        print(f"✅ {file}: {count} trips remaining.")
+if __name__ == "__main__":
+    main()
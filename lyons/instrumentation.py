@@ -0,0 +1,135 @@
+import contextlib
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+
+# Set to 1 (timings and counters) or cprofile (also a cProfile dump) to
+# instrument every entry point without passing --profile
+ENV_VAR = "LYONS_PROFILE"
+MODES = ["timing", "cprofile"]
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in kB on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class Recorder:
+    """Stage timers and counters of one process
+
+    Disabled by default: stage() is then a no-op context manager and count()
+    returns immediately, so instrumented code pays next to nothing.
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.profiler = None
+        self.reset()
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    def reset(self):
+        """Forget earlier stages and counters, e.g. between the cells a worker runs"""
+        self.stages = {}
+        self.counters = {}
+        self.started = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def enable(self, mode="timing"):
+        """Start recording; also exports the mode so worker processes record too"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}', expected one of {MODES}")
+        self.mode = mode
+        os.environ[ENV_VAR] = mode
+        if mode == "cprofile" and self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.reset()
+
+    def stage(self, name):
+        """Context manager adding the time spent inside it to stage name"""
+        if self.mode is None:
+            return contextlib.nullcontext()
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            stage["seconds"] += time.perf_counter() - start
+            stage["calls"] += 1
+
+    def count(self, name, amount=1):
+        if self.mode is not None:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self, entry=None):
+        return {
+            "entry": entry,
+            "wall_seconds": time.perf_counter() - self.started,
+            "stages": self.stages,
+            "counters": self.counters,
+            "peak_rss_mb": _peak_rss_mb(),
+            # SUMO and other subprocesses that have finished
+            "children_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        }
+
+    def write_report(self, report_file, entry=None):
+        """Save the timing report (and the cProfile stats next to it), return its path or None when disabled"""
+        if self.mode is None:
+            return None
+        with open(report_file, "w") as file:
+            json.dump(self.report(entry), file, indent=2)
+        if self.profiler is not None:
+            self.profiler.dump_stats(report_file[:-len(".json")] + ".prof")
+        return report_file
+
+
+RECORDER = Recorder()
+
+# Module-level shortcuts used by the instrumented scripts
+stage = RECORDER.stage
+count = RECORDER.count
+reset = RECORDER.reset
+write_report = RECORDER.write_report
+
+
+def enable(mode=None):
+    """Turn recording on for mode, else for whatever LYONS_PROFILE asks for (if anything)"""
+    if mode is None:
+        value = os.environ.get(ENV_VAR, "").strip().lower()
+        if value in ("", "0", "false", "no"):
+            return False
+        mode = value if value in MODES else "timing"
+    RECORDER.enable(mode)
+    return True
+
+
+def add_profile_argument(parser):
+    """--profile [timing|cprofile] for an entry point's argparse parser"""
+    parser.add_argument("--profile", nargs="?", const="timing", choices=MODES,
+                        help=f"write a <name>.timing.json report per output (cprofile: also a .prof dump); "
+                             f"same as {ENV_VAR}=1")
+
+
+def report_file_for(output_file):
+    """Timing report written next to an output, e.g. AM_90_SAtrue.csv -> AM_90_SAtrue.timing.json"""
+    return os.path.splitext(output_file)[0] + ".timing.json"
+
+
+def count_bytes(path):
+    """Count a file about to be parsed in the bytes_read counter"""
+    if RECORDER.enabled:
+        count("bytes_read", os.path.getsize(path))
@@ -0,0 +1,103 @@
+import xml.etree.ElementTree as ET
+import json
+import os
+
+from compressed_io import open_input
+from result_cache import atomic_output, derived_cache_file
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+INDEX_CACHE_DIR = os.path.join(BASE_DIR, ".network_index")
+# Layout of the cached lane index, see result_cache.derived_cache_file
+INDEX_CACHE_VERSION = 1
+
+# Canonical order of the directions in every table and CSV
+DIRECTIONS = ["Northbound", "Southbound", "Eastbound", "Westbound"]
+
+
+def heading_direction(shape):
+    """Compass direction of travel along a lane shape ("x1,y1 x2,y2 ...")"""
+    points = shape.split()
+    x1, y1 = map(float, points[0].split(","))
+    x2, y2 = map(float, points[-1].split(","))
+    dx, dy = x2 - x1, y2 - y1
+    if abs(dx) > abs(dy):
+        return "Eastbound" if dx > 0 else "Westbound"
+    return "Northbound" if dy > 0 else "Southbound"
+
+
+def build_lane_index(net_file):
+    """Stream a .net.xml once into lane id -> {length, edge, direction}
+
+    Internal junction lanes (ids starting with ':') are left out.
+    """
+    index = {}
+    edge_id = None
+
+    with open_input(net_file) as stream:
+        context = ET.iterparse(stream, events=("start", "end"))
+        _, root = next(context)
+
+        for event, elem in context:
+            if event == "start":
+                if elem.tag == "edge":
+                    edge_id = elem.get("id")
+                continue
+
+            if elem.tag == "lane" and edge_id is not None and not edge_id.startswith(":"):
+                index[elem.get("id")] = {
+                    "length": float(elem.get("length")),
+                    "edge": edge_id,
+                    "direction": heading_direction(elem.get("shape")),
+                }
+            elif elem.tag == "edge":
+                edge_id = None
+                root.clear()
+
+    return index
+
+
+def load_lane_index(net_file, cache_dir=INDEX_CACHE_DIR):
+    """Lane index of a net file, cached on disk by the file's sha256"""
+    cache_file = derived_cache_file(cache_dir, net_file, INDEX_CACHE_VERSION, ".json")
+    try:
+        with open(cache_file) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    index = build_lane_index(net_file)
+    with atomic_output(cache_file) as tmp_file, open(tmp_file, "w") as file:
+        json.dump(index, file)
+    return index
+
+
+def read_detectors(additional_file):
+    """(detector id, lane id) of every induction loop in an additional file, in file order"""
+    root = ET.parse(additional_file).getroot()
+    return [(loop.get("id"), loop.get("lane")) for loop in root.iter("inductionLoop")]
+
+
+def lane_tables(additional_file, net_file, cache_dir=INDEX_CACHE_DIR):
+    """LANE_GROUPS / LANE_LENGTHS / LANE_IDS equivalents derived from the detectors and the net"""
+    index = load_lane_index(net_file, cache_dir)
+
+    groups = {direction: [] for direction in DIRECTIONS}
+    lengths = {}
+    ids = {}
+    for detector_id, lane_id in read_detectors(additional_file):
+        if lane_id not in index:
+            raise KeyError(f"Detector {detector_id} is on lane {lane_id}, which is not in {net_file}")
+        lane = index[lane_id]
+        groups.setdefault(lane["direction"], []).append(detector_id)
+        lengths[detector_id] = lane["length"]
+        ids[detector_id] = lane_id
+
+    return {
+        "groups": groups,
+        "lengths": lengths,
+        "ids": ids,
+        "directions": {detector: direction for direction, detectors in groups.items() for detector in detectors},
+        # Heading of every lane of the net, e.g. to give each trip a direction
+        "lane_directions": {lane_id: lane["direction"] for lane_id, lane in index.items()},
+    }
@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+from extract_traffic_data import scenario_label
+from result_cache import CACHE_DIR, DEFAULT_MAX_BYTES, evict_cache
+from run_sweep import ACTUATION, CYCLE_TIMES, SCENARIOS, default_options, run_cell
+from signal_programs import MAX_DUR, MIN_DUR
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (low, high, step) of every searched parameter; values are snapped to the
+# step so nearby samples collapse onto the same cached cell
+SEARCH_SPACE = {
+    "cycle_time": (60, 150, 5),
+    # Share of the green time given to the first green phase
+    "split": (0.3, 0.7, 0.05),
+    "min_dur": (3, 15, 1),
+    "max_dur": (30, 90, 5),
+}
+
+# Split of the base programs, whose two greens are equally long
+BASE_SPLIT = 0.5
+
+# Weight of each per-direction metric in the score (lower is better); flow is
+# negative because more vehicles through the intersection is better
+SCORE_WEIGHTS = {"avg_delay": 1.0, "avg_density": 1.0, "avg_flow": -1.0}
+
+
+def snap(value, low, high, step):
+    """value rounded to the grid low, low + step, ..., high (an int on an integer grid)"""
+    value = min(max(value, low), high)
+    value = round(low + round((value - low) / step) * step, 6)
+    return int(value) if isinstance(step, int) else value
+
+
+def make_candidate(cycle_time, actuated, split=BASE_SPLIT, min_dur=MIN_DUR, max_dur=MAX_DUR):
+    """A signal timing to evaluate; static timings have no minDur/maxDur"""
+    candidate = {"cycle_time": int(cycle_time), "actuated": actuated, "split": split}
+    if actuated:
+        candidate.update(min_dur=min_dur, max_dur=max(max_dur, min_dur))
+    return candidate
+
+
+def sample_candidates(count, rng, actuation=ACTUATION, seeds=()):
+    """count distinct candidates: the seeds (e.g. the study's hand-picked timings) then random draws"""
+    candidates = []
+    seen = set()
+
+    def add(candidate):
+        key = json.dumps(candidate, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(candidate)
+
+    for candidate in seeds:
+        add(candidate)
+    attempts = 0
+    while len(candidates) < count and attempts < 100 * count:
+        attempts += 1
+        values = {name: snap(rng.uniform(low, high), low, high, step)
+                  for name, (low, high, step) in SEARCH_SPACE.items()}
+        add(make_candidate(values["cycle_time"], rng.choice(actuation), values["split"],
+                           values["min_dur"], values["max_dur"]))
+    return candidates[:count]
+
+
+def candidate_cell(scenario, candidate):
+    """Sweep cell simulating a candidate; the base timing keeps the plain sweep cell"""
+    label = scenario_label(scenario)
+    signal = {}
+    name = f"{label}_{candidate['cycle_time']}_SA{str(candidate['actuated']).lower()}"
+    if candidate["split"] != BASE_SPLIT:
+        signal["splits"] = [candidate["split"], round(1 - candidate["split"], 6)]
+        name += f"_g{round(candidate['split'] * 100)}"
+    if candidate["actuated"] and (candidate["min_dur"], candidate["max_dur"]) != (MIN_DUR, MAX_DUR):
+        signal.update(min_dur=candidate["min_dur"], max_dur=candidate["max_dur"])
+        name += f"_m{candidate['min_dur']:g}-{candidate['max_dur']:g}"
+    cell = {"scenario": scenario, "label": label, "cycle_time": candidate["cycle_time"],
+            "actuated": candidate["actuated"], "name": name}
+    if signal:
+        cell["signal"] = signal
+    return cell
+
+
+def evaluate(pool, cells, seeds, sweep_dir, options):
+    """Mean per-direction metrics of every cell over seeds, or None for a cell whose runs failed
+
+    Every (cell, seed) runs as its own task; seeds already simulated in an
+    earlier round, or in an earlier search, come straight from the cache.
+    """
+    tasks = [dict(cell, seed=seed, name=f"{cell['name']}_s{seed}") for cell in cells for seed in seeds]
+    futures = [pool.submit(run_cell, task, sweep_dir, options) for task in tasks]
+
+    results = []
+    for i, cell in enumerate(cells):
+        runs = []
+        for future in futures[i * len(seeds):(i + 1) * len(seeds)]:
+            try:
+                runs.append(future.result()[0])
+            except Exception as error:
+                print(f"❌ {cell['name']}: {error}")
+        if len(runs) < len(seeds):
+            results.append(None)
+            continue
+        results.append({direction: {metric: sum(run[direction][metric] for run in runs) / len(runs)
+                                    for metric in SCORE_WEIGHTS}
+                        for direction in runs[0]})
+    return results
+
+
+def score(results, weights=SCORE_WEIGHTS):
+    """Score of every evaluated candidate of a round, lower is better
+
+    Each metric is averaged over the directions and divided by its mean over
+    the round, so delays in seconds and flows in veh/hr weigh in alike.
+    """
+    means = [{metric: sum(values[metric] for values in result.values()) / len(result) for metric in weights}
+             if result else None for result in results]
+    valid = [mean for mean in means if mean is not None]
+    scales = {metric: abs(sum(mean[metric] for mean in valid) / len(valid)) or 1.0 for metric in weights} \
+        if valid else {}
+    return [sum(weight * mean[metric] / scales[metric] for metric, weight in weights.items())
+            if mean is not None else float("inf") for mean in means]
+
+
+def successive_halving(pool, scenario, candidates, sweep_dir, options, eta=3, min_seeds=1, base_seed=0):
+    """Keep the best 1/eta of the candidates per round, giving the survivors eta times more seeds
+
+    Returns the rounds, each a list of {"candidate", "cell", "seeds", "metrics", "score"}
+    sorted from best to worst; the first entry of the last round is the winner.
+    """
+    rounds = []
+    survivors = candidates
+    seeds = min_seeds
+    while True:
+        cells = [candidate_cell(scenario, candidate) for candidate in survivors]
+        seed_range = list(range(base_seed, base_seed + seeds))
+        with instrumentation.stage("evaluate"):
+            results = evaluate(pool, cells, seed_range, sweep_dir, options)
+        scores = score(results)
+        ranked = sorted(zip(scores, range(len(survivors))))
+        rounds.append([{"candidate": survivors[i], "cell": cells[i]["name"], "seeds": seeds,
+                        "metrics": results[i], "score": value} for value, i in ranked])
+        best = rounds[-1][0]
+        print(f"🔎 {scenario_label(scenario)} round {len(rounds)}: {len(survivors)} candidate(s) x {seeds} seed(s), "
+              f"best {best['cell']} (score {best['score']:.3f})")
+        instrumentation.count("candidates_evaluated", len(survivors))
+
+        # A single survivor is the winner, it needs no round of its own
+        keep = len(survivors) // eta
+        if keep <= 1:
+            return rounds
+        survivors = [survivors[i] for value, i in ranked[:keep] if value != float("inf")]
+        if not survivors:
+            return rounds
+        seeds *= eta
+
+
+def optimize(scenarios, sweep_dir, options, candidates=27, eta=3, min_seeds=1, base_seed=0, seed=0,
+             actuation=ACTUATION, workers=None):
+    """Search the best signal timing of every scenario, return {scenario: rounds}
+
+    The search starts from the study's cycle times plus random candidates
+    and runs on one worker pool for all scenarios.
+    """
+    rng = random.Random(seed)
+    study = [make_candidate(cycle_time, actuated) for cycle_time in CYCLE_TIMES for actuated in actuation]
+    searches = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for scenario in scenarios:
+            pool_candidates = sample_candidates(candidates, rng, actuation, study)
+            searches[scenario] = successive_halving(pool, scenario, pool_candidates, sweep_dir, options,
+                                                    eta, min_seeds, base_seed)
+    return searches
+
+
+def write_results(searches, output_file):
+    """Save every round of every search and the best timing per scenario as JSON"""
+    summary = {
+        "weights": SCORE_WEIGHTS,
+        "best": {scenario_label(scenario): rounds[-1][0] for scenario, rounds in searches.items()},
+        "rounds": {scenario_label(scenario): rounds for scenario, rounds in searches.items()},
+    }
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "w") as file:
+        json.dump(summary, file, indent=2)
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search cycle length, green split and actuation bounds per scenario "
+                                                 "with successive halving.")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, help="scenario folders to optimise")
+    parser.add_argument("--actuation", nargs="+", choices=["static", "actuated"], default=["static", "actuated"])
+    parser.add_argument("--candidates", type=int, default=27, help="timings in the first round, including the study's")
+    parser.add_argument("--eta", type=int, default=3, help="keep 1/ETA of the candidates per round, with ETA x the seeds")
+    parser.add_argument("--min-seeds", type=int, default=1, help="seeds per candidate in the first round")
+    parser.add_argument("--seed", type=int, default=0, help="first SUMO seed of every candidate")
+    parser.add_argument("--search-seed", type=int, default=0, help="seed of the random candidate draws")
+    parser.add_argument("--sweep-dir", default=os.path.join(BASE_DIR, "optimize"), help="where the per-run directories are created")
+    parser.add_argument("--output", default=os.path.join(BASE_DIR, "Data", "signal_optimization.json"),
+                        help="every round and the best timing per scenario")
+    parser.add_argument("--sumo-binary", default="sumo", help="simulator executable")
+    parser.add_argument("--workers", type=int, help="parallel runs (default: number of cores)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="content-addressed result cache, shared with run_sweep.py --seed runs")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20, help="evict least recently used entries above this size")
+    parser.add_argument("--no-cache", action="store_true", help="always simulate, never read or write the cache")
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    instrumentation.enable(args.profile)
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+
+    cache = None if args.no_cache else {"dir": args.cache_dir, "max_bytes": int(args.cache_max_mb * 2**20), "raw": False}
+    # Per-run outputs stay in the sweep directory; the search only needs the metrics
+    options = default_options(sumo_binary=args.sumo_binary, cache=cache)
+    actuation = [mode == "actuated" for mode in args.actuation]
+
+    searches = optimize(args.scenarios, args.sweep_dir, options, args.candidates, args.eta, args.min_seeds,
+                        args.seed, args.search_seed, actuation, args.workers)
+    if cache is not None:
+        evict_cache(cache["dir"], cache["max_bytes"])
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    write_results(searches, args.output)
+    for scenario, rounds in searches.items():
+        best = rounds[-1][0]
+        print(f"🏁 {scenario_label(scenario)}: {best['cell']} {json.dumps(best['candidate'])}")
+    print(f"Results saved to {args.output}")
+    instrumentation.write_report(instrumentation.report_file_for(args.output), "optimize_signals")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CACHE_DIR = os.path.join(BASE_DIR, ".sweep_cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Bump when the way metrics are computed changes, so older entries stop matching
+METRICS_VERSION = 5
+
+# (path, mtime, size) -> sha256, so a net file shared by many cells is hashed once per process
+_file_hashes = {}
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """sha256 of a file's contents"""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(chunk_size), b""):
+                digest.update(chunk)
+        _file_hashes[memo_key] = digest.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def derived_cache_file(cache_dir, source_file, version, suffix):
+    """Cache file for data derived from source_file: <sha256 of its contents>_v<version><suffix> in cache_dir
+
+    version belongs to the caller; bump it when what is derived from the file
+    changes, so entries written by older code stop matching.
+    """
+    return os.path.join(cache_dir, f"{file_hash(source_file)}_v{version}{suffix}")
+
+
+@contextlib.contextmanager
+def atomic_output(path):
+    """Temporary path to write path's new contents to, moved over path once the block succeeds
+
+    Readers never see a half-written file, and concurrent writers each use their
+    own temporary name. The extension is kept (np.savez appends .npz otherwise).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    root, extension = os.path.splitext(path)
+    tmp_file = f"{root}.{os.getpid()}.tmp{extension}"
+    try:
+        yield tmp_file
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    os.replace(tmp_file, path)
+
+
+def cell_key(params, input_files):
+    """Cache key for a sweep cell: its parameters plus the contents of every input file
+
+    File names are left out on purpose, so moving or renaming an unchanged
+    input still hits the cache.
+    """
+    payload = {
+        "version": METRICS_VERSION,
+        "params": params,
+        "inputs": sorted(file_hash(path) for path in input_files),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def cache_lookup(key, cache_dir=CACHE_DIR):
+    """Cached {"metrics", "run"} entry for key, or None on a miss"""
+    metrics_file = os.path.join(cache_dir, key, "metrics.json")
+    try:
+        with open(metrics_file) as file:
+            metrics = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    # Mark the entry as recently used for eviction
+    os.utime(os.path.join(cache_dir, key))
+    return metrics
+
+
+def cache_store(key, metrics, cache_dir=CACHE_DIR, raw_files=()):
+    """Store the metrics (any JSON value) of a cell, plus copies of its raw output files if given"""
+    entry_dir = os.path.join(cache_dir, key)
+    os.makedirs(entry_dir, exist_ok=True)
+
+    for path in raw_files:
+        shutil.copy2(path, os.path.join(entry_dir, os.path.basename(path)))
+
+    # Write metrics last and atomically: an entry only counts once metrics.json exists
+    with atomic_output(os.path.join(entry_dir, "metrics.json")) as tmp_file, open(tmp_file, "w") as file:
+        json.dump(metrics, file)
+
+
+def entry_size(entry_dir):
+    """Bytes used by one cache entry"""
+    return sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """Delete least recently used entries until the cache fits in max_bytes, return bytes freed"""
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = [(entry.stat().st_mtime, entry_size(entry.path), entry.path)
+               for entry in os.scandir(cache_dir) if entry.is_dir()]
+    total = sum(size for _, size, _ in entries)
+
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        freed += size
+    return freed
@@ -0,0 +1,250 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+from compressed_io import open_input
+from extract_traffic_data import CSV_HEADER, METRICS, RUN_CSV_SUFFIX, RUN_NAME, SCENARIO_LABELS
+from result_cache import file_hash
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DB_FILE = os.path.join(BASE_DIR, "Data", "results.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    label TEXT NOT NULL,
+    cycle_time INTEGER NOT NULL,
+    actuated INTEGER NOT NULL,
+    seed INTEGER,
+    signal TEXT,
+    input_hashes TEXT,
+    run_info TEXT,
+    timings TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_dimensions ON runs (label, cycle_time, actuated, seed);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    direction TEXT NOT NULL,
+    avg_flow REAL,
+    avg_density REAL,
+    avg_distance REAL,
+    avg_delay REAL,
+    PRIMARY KEY (run_id, direction)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS metrics_direction ON metrics (direction);
+
+CREATE TABLE IF NOT EXISTS intervals (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    detector TEXT NOT NULL,
+    begin REAL,
+    end REAL,
+    flow REAL,
+    occupancy REAL,
+    speed REAL
+);
+CREATE INDEX IF NOT EXISTS intervals_run ON intervals (run_id, detector, begin);
+
+CREATE TABLE IF NOT EXISTS trips (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    depart REAL,
+    duration REAL,
+    route_length REAL,
+    waiting_time REAL,
+    time_loss REAL,
+    direction TEXT
+);
+CREATE INDEX IF NOT EXISTS trips_run ON trips (run_id, direction);
+"""
+
+# Only the latest run of every name and seed: re-running a cell after its
+# inputs changed stores it under a new key, next to the stale one
+LATEST_RUNS = """
+r.id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY name, seed ORDER BY created_at DESC, id DESC)
+                                    AS recency FROM runs) WHERE recency = 1)
+"""
+
+# Columns of final_data.csv / summarize_data, so the analysis reads either source alike
+SUMMARY_QUERY = """
+SELECT r.label AS "Time of Day",
+       r.cycle_time AS "Traffic Light Cycle Time",
+       CASE WHEN r.actuated THEN 'On' ELSE 'Off' END AS "Signal Actuation",
+       AVG(m.avg_flow) AS avg_flow_rate,
+       AVG(m.avg_density) AS avg_density,
+       AVG(m.avg_distance) AS avg_inter_distance,
+       COUNT(DISTINCT r.id) AS runs
+FROM runs r JOIN metrics m ON m.run_id = r.id
+{where}
+GROUP BY r.label, r.cycle_time, r.actuated
+ORDER BY r.label, r.cycle_time, r.actuated
+"""
+
+
+def connect(db_file=DB_FILE):
+    """Open (and create if needed) the results database"""
+    conn = sqlite3.connect(db_file)
+    # WAL lets the analysis read while a sweep is writing
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def store_run(conn, run, metrics, intervals=None, trips=None):
+    """Insert one run with its per-direction metrics (and intervals/trips) in a single transaction
+
+    run holds the columns of the runs table; a run with the same run_key is
+    replaced, together with everything stored for it. intervals are the
+    columns of run_archive.read_detector_intervals, trips a tripinfo_table
+    DataFrame. Returns the run id.
+    """
+    row = dict(run)
+    row.setdefault("created_at", time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()))
+    for key in ("signal", "input_hashes", "run_info", "timings"):
+        if row.get(key) is not None and not isinstance(row[key], str):
+            row[key] = json.dumps(row[key], sort_keys=True)
+    columns = ["run_key", "name", "scenario", "label", "cycle_time", "actuated", "seed", "signal",
+               "input_hashes", "run_info", "timings", "created_at"]
+
+    with conn:
+        conn.execute("DELETE FROM runs WHERE run_key = ?", (row["run_key"],))
+        run_id = conn.execute(f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                              [row.get(column) for column in columns]).lastrowid
+        conn.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?)", [
+            (run_id, direction, *(values.get(name) for name in METRICS), values.get("avg_delay"))
+            for direction, values in metrics.items()
+        ])
+        if intervals is not None:
+            names = intervals["detector_names"]
+            conn.executemany("INSERT INTO intervals VALUES (?, ?, ?, ?, ?, ?, ?)", zip(
+                [run_id] * len(intervals["detector_code"]), names[intervals["detector_code"]].tolist(),
+                *(intervals[name].tolist() for name in ("begin", "end", "flow", "occupancy", "speed"))))
+        if trips is not None:
+            conn.executemany("INSERT INTO trips VALUES (?, ?, ?, ?, ?, ?, ?)", zip(
+                [run_id] * len(trips), *(trips[name].tolist() for name in
+                                         ("depart", "duration", "routeLength", "waitingTime", "timeLoss")),
+                trips["direction"].astype(object).where(trips["direction"].notna(), None).tolist()))
+    return run_id
+
+
+def read_metrics_csv(csv_file):
+    """Per-direction metrics of a run CSV written by write_traffic_csv"""
+    columns = dict(zip(CSV_HEADER[1:], METRICS))
+    with open_input(csv_file, "rt") as file:
+        return {row["Direction"]: {name: float(row[column]) for column, name in columns.items()}
+                for row in csv.DictReader(file)}
+
+
+def csv_run(csv_file):
+    """runs row of a run CSV, from its <name>.json sidecar when present, else its name; None if not a run"""
+    name = RUN_CSV_SUFFIX.sub("", os.path.basename(csv_file))
+    match = RUN_NAME.match(name)
+    info_file = os.path.join(os.path.dirname(csv_file), name + ".json")
+    info = {}
+    if os.path.exists(info_file):
+        with open(info_file) as file:
+            info = json.load(file)
+    elif match is None:
+        return None
+
+    label = info.get("label") or match["label"]
+    scenarios = {label: scenario for scenario, label in SCENARIO_LABELS.items()}
+    return {
+        # One row per run name; the CSV's hash tells whether it changed since it was stored
+        "run_key": f"csv:{name}",
+        "name": name,
+        "scenario": info.get("scenario") or scenarios.get(label, label),
+        "label": label,
+        "cycle_time": int(info.get("cycle_time") or match["cycle_time"]),
+        "actuated": bool(info["actuated"]) if "actuated" in info else match["actuated"] == "true",
+        "seed": info.get("seed", int(match["seed"]) if match and match["seed"] else None),
+        "input_hashes": {"csv": file_hash(csv_file)},
+        "run_info": {key: value for key, value in info.items()
+                     if key not in ("scenario", "label", "cycle_time", "actuated")} or None,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(os.path.getmtime(csv_file))),
+    }
+
+
+def sweep_run_names(conn):
+    """Names of the runs stored by run_sweep.py --db rather than ingested from CSVs"""
+    return {name for name, in conn.execute("SELECT name FROM runs WHERE run_key NOT LIKE 'csv:%'")}
+
+
+def ingest_csv_dir(conn, directory):
+    """Add every run CSV of a directory (e.g. Data/) that is new or changed since it was stored, return how many
+
+    CSVs of runs the sweep already stored, per seed for a replicated cell,
+    are skipped (and any earlier copy of them dropped) so no run counts twice.
+    """
+    known = {(key, hashes) for key, hashes in conn.execute(
+        "SELECT run_key, input_hashes FROM runs WHERE run_key LIKE 'csv:%'")}
+    stored = sweep_run_names(conn)
+    added = 0
+    for filename in sorted(os.listdir(directory)):
+        csv_file = os.path.join(directory, filename)
+        if not RUN_CSV_SUFFIX.search(filename) or filename.endswith("_trips.csv"):
+            continue
+        run = csv_run(csv_file)
+        if run is None:
+            continue
+        seeds = (run["run_info"] or {}).get("seeds") or []
+        if run["name"] in stored or any(f"{run['name']}_s{seed}" in stored for seed in seeds):
+            with conn:
+                conn.execute("DELETE FROM runs WHERE run_key = ?", (run["run_key"],))
+            continue
+        if (run["run_key"], json.dumps(run["input_hashes"], sort_keys=True)) in known:
+            continue
+        store_run(conn, run, read_metrics_csv(csv_file))
+        added += 1
+    return added
+
+
+def query_summary(db_file=DB_FILE, where=None, params=(), history=False):
+    """Mean metrics per time of day x cycle time x actuation, in the layout of summarize_data
+
+    where is an optional SQL condition over runs r and metrics m, e.g.
+    "m.direction = 'Westbound' AND r.created_at >= '2026-09-01'". Only the
+    latest run of every name and seed counts, unless history is set.
+    """
+    import pandas as pd
+    conditions = ([] if history else [LATEST_RUNS.strip()]) + ([f"({where})"] if where else [])
+    conn = connect(db_file)
+    try:
+        return pd.read_sql_query(SUMMARY_QUERY.format(where="WHERE " + " AND ".join(conditions) if conditions else ""),
+                                 conn, params=params)
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load run CSVs into the SQLite results database and query it.")
+    parser.add_argument("--db", default=DB_FILE, help="database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="add the run CSVs of directories (e.g. Data/) not stored yet")
+    ingest.add_argument("directories", nargs="+")
+    summary = commands.add_parser("summary", help="mean metrics per time of day x cycle time x actuation")
+    summary.add_argument("--where", help="SQL condition over runs r and metrics m")
+    summary.add_argument("--history", action="store_true",
+                         help="also average earlier runs of a name and seed, not only the latest")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        conn = connect(args.db)
+        for directory in args.directories:
+            print(f"✅ {directory}: {ingest_csv_dir(conn, directory)} new run(s)")
+        conn.close()
+    else:
+        print(query_summary(args.db, args.where, history=args.history).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+import os
+
+from compressed_io import compression_for, open_input, open_output
+
+QUOTE_ENTITY = {'"': "&quot;"}
+
+
+def stream_routes(input_file):
+    """Stream a .rou.xml: returns the root tag, its attributes and an iterator of top-level elements
+
+    Each element is detached from the tree once the next one is read, so only
+    one trip (or vType/route) is held in memory at a time. Gzip and zstd
+    files are decompressed on the fly; the file is closed once the iterator
+    is exhausted.
+    """
+    stream = open_input(input_file)
+    context = ET.iterparse(stream, events=("start", "end"))
+    _, root = next(context)
+    root_tag, root_attrib = root.tag, dict(root.attrib)
+
+    def elements():
+        depth = 0
+        try:
+            for event, elem in context:
+                if event == "start":
+                    depth += 1
+                    continue
+                depth -= 1
+                if depth == 0:
+                    yield elem
+                    root.clear()
+        finally:
+            stream.close()
+
+    return root_tag, root_attrib, elements()
+
+
+def _start_tag(tag, attrib):
+    """Opening tag of the root, writing namespaced attributes (xsi:...) with a prefix"""
+    namespaces = {}
+    parts = [tag]
+    for key, value in attrib.items():
+        if key.startswith("{"):
+            uri, local = key[1:].split("}")
+            prefix = "xsi" if uri == "http://www.w3.org/2001/XMLSchema-instance" else f"ns{len(namespaces)}"
+            namespaces[uri] = prefix
+            key = f"{prefix}:{local}"
+        parts.append(f'{key}="{escape(value, QUOTE_ENTITY)}"')
+    for uri, prefix in namespaces.items():
+        parts.insert(1, f'xmlns:{prefix}="{uri}"')
+    return "<" + " ".join(parts) + ">"
+
+
+class RouteWriter:
+    """Incremental .rou.xml writer
+
+    The file is written next to the destination and moved into place on
+    close, so output_file may be the file being streamed from. A .gz or .zst
+    output_file is compressed as it is written.
+    """
+
+    def __init__(self, output_file, root_tag, root_attrib):
+        self.output_file = output_file
+        self.root_tag = root_tag
+        self.tmp_file = f"{output_file}.{os.getpid()}.tmp"
+        self.file = open_output(self.tmp_file, "wt", compression_for(output_file))
+        self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self.file.write(_start_tag(root_tag, root_attrib) + "\n")
+        self.count = 0
+
+    def write(self, elem):
+        elem.tail = None
+        self.file.write("    " + ET.tostring(elem, encoding="unicode") + "\n")
+        self.count += 1
+
+    def close(self):
+        """Finish the file and move it into place, return how many elements were written"""
+        self.file.write(f"</{self.root_tag}>\n")
+        self.file.close()
+        os.replace(self.tmp_file, self.output_file)
+        return self.count
+
+    def discard(self):
+        """Drop what was written, leaving output_file untouched"""
+        self.file.close()
+        os.remove(self.tmp_file)
+
+
+def write_routes(output_file, root_tag, root_attrib, elements):
+    """Write elements straight to output_file as they arrive, return how many were written"""
+    writer = RouteWriter(output_file, root_tag, root_attrib)
+    for elem in elements:
+        writer.write(elem)
+    return writer.close()
@@ -0,0 +1,146 @@
+import argparse
+import heapq
+import pickle
+import shutil
+import tempfile
+
+from route_io import RouteWriter, stream_routes, write_routes
+
+# Trips held in memory before a sorted run is spilled to disk
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+class OutOfOrder(Exception):
+    """A streaming DepartSort met a trip departing before the previous one"""
+
+
+class DepartSort:
+    """Pipeline stage ordering trips by their 'depart' time
+
+    Elements without a depart time (vType, route, ...) are emitted first in
+    their original order, so definitions stay ahead of the trips using them.
+    Trips with equal depart times keep their input order.
+
+    This is an external merge sort: every chunk_size trips are sorted and
+    spilled to a temporary file, and the runs are k-way merged on output, so
+    memory is bounded by one chunk however large the route file is. If the
+    input turns out to be sorted already, the runs are simply concatenated.
+
+    With stream=True nothing is held back: elements are passed on as they
+    arrive, in input order, and OutOfOrder is raised at the first trip that
+    departs before the previous one, so the caller can fall back to sorting.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, stream=False):
+        self.chunk_size = chunk_size
+        self.stream = stream
+        self.definitions = []
+        self.chunk = []
+        self.runs = []
+        self.tmp_dir = None
+        self.seq = 0
+        self.last_depart = float("-inf")
+        self.already_sorted = True
+
+    def push(self, elem):
+        depart = elem.get("depart")
+        if self.stream:
+            if depart is not None:
+                if float(depart) < self.last_depart:
+                    raise OutOfOrder(f"{elem.get('id')} departs at {depart}, before {self.last_depart}")
+                self.last_depart = float(depart)
+            return (elem,)
+        if depart is None:
+            self.definitions.append(elem)
+            return ()
+
+        depart = float(depart)
+        if depart < self.last_depart:
+            self.already_sorted = False
+        self.last_depart = depart
+
+        self.chunk.append((depart, self.seq, elem))
+        self.seq += 1
+        if len(self.chunk) >= self.chunk_size:
+            self._spill()
+        return ()
+
+    def _spill(self):
+        """Write the current chunk as a sorted run"""
+        if self.tmp_dir is None:
+            self.tmp_dir = tempfile.mkdtemp(prefix="route_sort_")
+        if not self.already_sorted:
+            self.chunk.sort(key=lambda record: record[:2])
+
+        path = f"{self.tmp_dir}/run_{len(self.runs)}.pickle"
+        with open(path, "wb") as file:
+            for depart, seq, elem in self.chunk:
+                pickle.dump((depart, seq, elem), file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.runs.append(path)
+        self.chunk = []
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, "rb") as file:
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
+
+    def finish(self):
+        yield from self.definitions
+
+        try:
+            if not self.already_sorted:
+                self.chunk.sort(key=lambda record: record[:2])
+            runs = [self._read_run(path) for path in self.runs] + [iter(self.chunk)]
+
+            if self.already_sorted:
+                # Fast path: runs are consecutive slices of sorted input
+                for run in runs:
+                    for _, _, elem in run:
+                        yield elem
+            else:
+                for _, _, elem in heapq.merge(*runs, key=lambda record: record[:2]):
+                    yield elem
+        finally:
+            if self.tmp_dir is not None:
+                shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def sort_route_file(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Sort a .rou.xml by depart time, return the number of elements written
+
+    Route files are usually sorted already, so the input is first copied
+    straight through; only when a trip departs before the previous one is
+    that copy dropped and the input read again through the external sort.
+    """
+    root_tag, root_attrib, elements = stream_routes(input_file)
+    writer = RouteWriter(output_file, root_tag, root_attrib)
+    stage = DepartSort(chunk_size, stream=True)
+    try:
+        for elem in elements:
+            for out in stage.push(elem):
+                writer.write(out)
+        return writer.close()
+    except OutOfOrder:
+        writer.discard()
+        elements.close()
+
+    root_tag, root_attrib, elements = stream_routes(input_file)
+    stage = DepartSort(chunk_size)
+    for elem in elements:
+        stage.push(elem)
+    return write_routes(output_file, root_tag, root_attrib, stage.finish())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sort the trips of a route file by depart time.")
+    parser.add_argument("input", nargs="?", default="lyons_Night.rou.xml")
+    parser.add_argument("output", nargs="?", default="sorted_lyons_Night.rou.xml")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="trips kept in memory per sorted run")
+    args = parser.parse_args()
+
+    sort_route_file(args.input, args.output, args.chunk_size)
+    print(f"XML file sorted and saved as '{args.output}'.")
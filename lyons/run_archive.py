@@ -0,0 +1,127 @@
+import xml.etree.ElementTree as ET
+import os
+import shutil
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from compressed_io import open_input
+from extract_traffic_data import DEFAULT_TABLES
+from tripinfo_table import FLOAT_COLUMNS, LANE_COLUMNS, load_tripinfo
+
+# Numeric attributes kept from every detector <interval>
+DETECTOR_COLUMNS = ["begin", "end", "flow", "occupancy", "speed", "harmonicMeanSpeed", "length",
+                    "nVehContrib", "nVehEntered"]
+
+
+def read_detector_intervals(file):
+    """Stream detector_output.xml into typed columns, one row per interval
+
+    Detector ids are stored as int32 codes into a small table of names.
+    """
+    numbers = {name: array("d") for name in DETECTOR_COLUMNS}
+    codes = array("i")
+    detector_codes = {}
+
+    with open_input(file) as stream:
+        context = ET.iterparse(stream, events=("start", "end"))
+        _, root = next(context)
+
+        for event, elem in context:
+            if event != "end" or elem.tag != "interval":
+                continue
+
+            get = elem.get
+            for name in DETECTOR_COLUMNS:
+                numbers[name].append(float(get(name, "nan")))
+            codes.append(detector_codes.setdefault(get("id"), len(detector_codes)))
+
+            root.clear()
+
+    arrays = {name: np.frombuffer(values, dtype=np.float64) for name, values in numbers.items()}
+    arrays["detector_code"] = np.frombuffer(codes, dtype=np.int32)
+    arrays["detector_names"] = np.array(list(detector_codes), dtype=str)
+    return arrays
+
+
+def write_run_archive(output_dir, detector_file, tripinfo_file=None, tables=DEFAULT_TABLES):
+    """Save every detector interval (and trip record) of a run as a directory of typed .npy arrays
+
+    One file per column (detector/begin.npy, trip/depart.npy, ...), so
+    load_run_archive can memory-map each of them.
+    """
+    arrays = {f"detector/{name}": values for name, values in read_detector_intervals(detector_file).items()}
+
+    if tripinfo_file is not None:
+        trips = load_tripinfo(tripinfo_file, tables)
+        for name in FLOAT_COLUMNS:
+            arrays[f"trip/{name}"] = trips[name].to_numpy()
+        for name in LANE_COLUMNS + ["direction"]:
+            arrays[f"trip/{name}_code"] = trips[name].cat.codes.to_numpy()
+            arrays[f"trip/{name}_names"] = np.array(trips[name].cat.categories, dtype=str)
+
+    # Written aside and moved in place, so a reader never sees half an archive
+    tmp_dir = f"{output_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    for name, values in arrays.items():
+        os.makedirs(os.path.join(tmp_dir, os.path.dirname(name)), exist_ok=True)
+        np.save(os.path.join(tmp_dir, name + ".npy"), values, allow_pickle=False)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return output_dir
+
+
+class RunArchive:
+    """Arrays of a run archive by name (e.g. "detector/flow"), each memory-mapped when first accessed"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = sorted(os.path.relpath(os.path.join(root, name), directory)[:-len(".npy")].replace(os.sep, "/")
+                            for root, _, names in os.walk(directory) for name in names if name.endswith(".npy"))
+
+    def __getitem__(self, name):
+        return np.load(os.path.join(self.directory, name + ".npy"), mmap_mode="r", allow_pickle=False)
+
+    def __contains__(self, name):
+        return name in self.files
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def load_run_archive(directory):
+    """Open a run archive; its arrays are memory-mapped, nothing is read until it is used"""
+    return RunArchive(directory)
+
+
+def detector_table(archive):
+    """Detector intervals of an archive as a DataFrame"""
+    table = pd.DataFrame({name: archive[f"detector/{name}"] for name in DETECTOR_COLUMNS})
+    table["id"] = pd.Categorical.from_codes(archive["detector/detector_code"], archive["detector/detector_names"])
+    return table
+
+
+def trip_table(archive):
+    """Trip records of an archive as a DataFrame, same layout as load_tripinfo"""
+    table = pd.DataFrame({name: archive[f"trip/{name}"] for name in FLOAT_COLUMNS})
+    for name in LANE_COLUMNS + ["direction"]:
+        table[name] = pd.Categorical.from_codes(archive[f"trip/{name}_code"], archive[f"trip/{name}_names"])
+    return table
+
+
+def combine_runs(files, table=detector_table, columns=None):
+    """Stack one table from many run archives, tagging rows with their source file"""
+    frames = []
+    for file in files:
+        with load_run_archive(file) as archive:
+            frame = table(archive)
+        if columns is not None:
+            frame = frame[columns]
+        frames.append(frame.assign(run=file))
+    combined = pd.concat(frames, ignore_index=True)
+    combined["run"] = combined["run"].astype("category")
+    return combined
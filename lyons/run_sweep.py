@@ -0,0 +1,510 @@
+import xml.etree.ElementTree as ET
+import argparse
+import itertools
+import json
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import instrumentation
+from convergence import RunningStats
+from edge_congestion import DEFAULT_EDGE_PERIOD, read_edge_data, write_edge_data, write_edge_data_definition
+from extract_traffic_data import METRICS, RESAMPLE_PERIODS, output_csv_name, parse_detector_output, run_tables, scenario_label, write_traffic_csv
+from result_cache import CACHE_DIR, DEFAULT_MAX_BYTES, cache_lookup, cache_store, cell_key, evict_cache, file_hash
+from results_db import DB_FILE, connect, store_run
+from signal_programs import BASE_NET, signal_overlay
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The full study matrix from the README: every folder x cycle time x static/actuated
+SCENARIOS = ["AM", "PM", "low_traffic_flow"]
+CYCLE_TIMES = [70, 90, 110]
+ACTUATION = [False, True]
+
+# SUMO gzips any output whose name ends in .gz; the parsers detect it by content
+COMPRESSED_SUFFIX = ".gz"
+
+
+
+def scenario_inputs(scenario):
+    """Route and detector files referenced by a scenario's simple.sumocfg"""
+    scenario_dir = os.path.join(BASE_DIR, scenario)
+    root = ET.parse(os.path.join(scenario_dir, "simple.sumocfg")).getroot()
+    route_file = root.find("input/route-files").get("value")
+    # The detector file comes first, signal overlays follow it
+    additional_file = root.find("input/additional-files").get("value").split(",")[0].strip()
+    return os.path.join(scenario_dir, route_file), os.path.join(scenario_dir, additional_file)
+
+
+def expand_matrix(scenarios=SCENARIOS, cycle_times=CYCLE_TIMES, actuation=ACTUATION):
+    """One cell per scenario x cycle time x actuation"""
+    cells = []
+    for scenario, cycle_time, actuated in itertools.product(scenarios, cycle_times, actuation):
+        label = scenario_label(scenario)
+        cells.append({
+            "scenario": scenario,
+            "label": label,
+            "cycle_time": cycle_time,
+            "actuated": actuated,
+            "name": output_csv_name(label, cycle_time, actuated)[:-len(".csv")],
+        })
+    return cells
+
+
+def expand_replications(cells, replications=1, base_seed=None):
+    """Split every cell into one task per seed, named <cell>_s<seed>
+
+    A single replication keeps the cell names (with the base seed, if any, or
+    SUMO's default seed otherwise).
+    """
+    if replications <= 1:
+        return cells if base_seed is None else [dict(cell, seed=base_seed) for cell in cells]
+    base_seed = base_seed or 0
+    tasks = []
+    for cell in cells:
+        for seed in range(base_seed, base_seed + replications):
+            tasks.append(dict(cell, seed=seed, name=f"{cell['name']}_s{seed}", cell_name=cell["name"]))
+    return tasks
+
+
+def write_detectors(source, destination, output_file="detector_output.xml"):
+    """Copy the detector definitions so they write into the run directory"""
+    tree = ET.parse(source)
+    for loop in tree.getroot().iter("inductionLoop"):
+        loop.set("file", output_file)
+    tree.write(destination)
+
+
+def run_outputs(run_dir, compress=False):
+    """Paths of the detector, tripinfo, edgeData and vehroute outputs SUMO writes into a run directory"""
+    suffix = COMPRESSED_SUFFIX if compress else ""
+    return (os.path.join(run_dir, "detector_output.xml" + suffix),
+            os.path.join(run_dir, "tripinfo.xml" + suffix),
+            os.path.join(run_dir, "edge_output.xml" + suffix),
+            os.path.join(run_dir, "vehroutes.xml" + suffix))
+
+
+def prepare_run(cell, sweep_dir, live=False, compress=False, edge_period=None):
+    """Create an isolated run directory with its own sumocfg, return the config path
+
+    Live runs read the loops over TraCI, so their detector file output is
+    discarded instead of written. With compress the outputs are gzipped by
+    SUMO as they are written. edge_period adds edge mean data for every edge
+    of the net, one record per edge and period.
+    """
+    run_dir = os.path.abspath(os.path.join(sweep_dir, cell["name"]))
+    os.makedirs(run_dir, exist_ok=True)
+    detector_output, tripinfo_output, edge_output, routes_output = (os.path.basename(path)
+                                                                    for path in run_outputs(run_dir, compress))
+
+    route_file, detector_file = scenario_inputs(cell["scenario"])
+    write_detectors(detector_file, os.path.join(run_dir, "detectors.add.xml"),
+                    "/dev/null" if live else detector_output)
+    # Every run shares the base net; its signal timing is a small tlLogic overlay
+    signal_overlay(os.path.join(run_dir, "signals.add.xml"), cell["cycle_time"], cell["actuated"], BASE_NET,
+                   **cell.get("signal", {}))
+
+    config = ET.Element("configuration")
+    inputs = ET.SubElement(config, "input")
+    ET.SubElement(inputs, "net-file", value=BASE_NET)
+    ET.SubElement(inputs, "route-files", value=route_file)
+    # Detectors first, run_tables reads the loops from the first additional file
+    additional_files = ["detectors.add.xml", "signals.add.xml"]
+    if edge_period:
+        write_edge_data_definition(os.path.join(run_dir, "edgedata.add.xml"), edge_output, edge_period)
+        additional_files.append("edgedata.add.xml")
+    ET.SubElement(inputs, "additional-files", value=",".join(additional_files))
+    outputs = ET.SubElement(config, "output")
+    ET.SubElement(outputs, "tripinfo-output", value=tripinfo_output)
+    # The routes driven, so trip metrics can tell which vehicles crossed the junction
+    ET.SubElement(outputs, "vehroute-output", value=routes_output)
+    if cell.get("seed") is not None:
+        ET.SubElement(ET.SubElement(config, "random_number"), "seed", value=str(cell["seed"]))
+
+    config_file = os.path.join(run_dir, "simple.sumocfg")
+    ET.ElementTree(config).write(config_file)
+    return config_file
+
+
+def cell_inputs(cell):
+    """Cache key parameters and input files of a cell"""
+    route_file, detector_file = scenario_inputs(cell["scenario"])
+    params = {key: cell[key] for key in ("scenario", "cycle_time", "actuated")}
+    if cell.get("seed") is not None:
+        params["seed"] = cell["seed"]
+    if cell.get("signal"):
+        params["signal"] = cell["signal"]
+    # signal_programs.py is an input too: it turns the base net into the cell's timing
+    return params, [BASE_NET, os.path.join(BASE_DIR, "signal_programs.py"), route_file, detector_file]
+
+
+def cell_key_inputs(cell, options):
+    """cell_inputs plus the sweep options that change how the metrics are computed"""
+    params, input_files = cell_inputs(cell)
+    # Live and post-hoc metrics are computed differently, keep them apart
+    params["live"] = options["live"]
+    params["convergence"] = options["convergence"]
+    return params, input_files
+
+
+def simulate(config_file, options):
+    """Run the simulator on a prepared config, return (per-direction results, run info, tables)
+
+    run info records how the run ended; with a convergence setting the run is
+    stopped as soon as every direction has settled and the stop time is kept.
+    """
+    run_dir = os.path.dirname(config_file)
+    sumo_binary = options["sumo_binary"]
+    with instrumentation.stage("lane_tables"):
+        tables = run_tables(run_dir)
+
+    if options["live"]:
+        from traci_collector import collect
+        monitor = None
+        if options["convergence"] is not None:
+            from convergence import ConvergenceMonitor
+            monitor = ConvergenceMonitor(tables, **options["convergence"])
+        with instrumentation.stage("sumo_live"):
+            detector_results, end_time = collect([sumo_binary, "-c", config_file],
+                                                 os.path.join(run_dir, "detectors.add.xml"), tables, monitor)
+        run_info = {"end_time": end_time}
+        if monitor is not None:
+            run_info.update(converged=monitor.stop_time is not None, stop_time=monitor.stop_time,
+                            **options["convergence"])
+        return detector_results, run_info, tables
+
+    with open(os.path.join(run_dir, "sumo.log"), "w") as log, instrumentation.stage("sumo"):
+        result = subprocess.run([sumo_binary, "-c", config_file], cwd=run_dir, stdout=log, stderr=subprocess.STDOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"{sumo_binary} exited with code {result.returncode}, see {os.path.join(run_dir, 'sumo.log')}")
+
+    with instrumentation.stage("detector_parse"):
+        detector_results = parse_detector_output(run_outputs(run_dir, options["compress"])[0], tables)
+    return detector_results, {}, tables
+
+
+def write_run_info(cell, run_info, output_csv):
+    """Save the cell parameters and how the run ended next to its CSV as <name>.json"""
+    info = {key: cell[key] for key in ("scenario", "label", "cycle_time", "actuated")}
+    info.update(run_info)
+    with open(output_csv[:-len(".csv")] + ".json", "w") as file:
+        json.dump(info, file, indent=2)
+
+
+def artefact_files(cell, run_dir, options):
+    """{option: file} of the per-run files the options ask for (<name>_archive/, _ts.npz, _edges.npz)
+
+    Live runs leave no detector XML, so they get no archive or time series.
+    """
+    output_dir = options["output_dir"] or run_dir
+    files = {}
+    if options["archive"] and not options["live"]:
+        files["archive"] = os.path.join(output_dir, cell["name"] + "_archive")
+    if options["time_series"] and not options["live"]:
+        files["time_series"] = os.path.join(output_dir, cell["name"] + "_ts.npz")
+    if options["edges"]:
+        files["edges"] = os.path.join(output_dir, cell["name"] + "_edges.npz")
+    return files
+
+
+def run_cell(cell, sweep_dir, options, force=False):
+    """Simulate one cell (or one seed of a cell), return (per-direction results, run info)
+
+    options holds the sweep-wide settings (see default_options). With a cache
+    the metrics of a cell whose inputs are unchanged are reused instead of
+    simulating and parsing again, unless a requested per-run file (archive,
+    time series, edges) is missing: only a simulation can write those.
+    """
+    run_dir = os.path.abspath(os.path.join(sweep_dir, cell["name"]))
+    cache = options["cache"]
+    # Workers pick LYONS_PROFILE up from the sweep process, one report per cell
+    instrumentation.enable()
+    report_file = instrumentation.report_file_for(os.path.join(options["output_dir"] or run_dir, cell["name"] + ".csv"))
+    artefacts = artefact_files(cell, run_dir, options)
+
+    key = None
+    if cache is not None:
+        params, input_files = cell_key_inputs(cell, options)
+        with instrumentation.stage("cache_lookup"):
+            key = cell_key(params, input_files)
+            cached = None if force else cache_lookup(key, cache["dir"])
+        missing = [os.path.basename(path) for path in artefacts.values() if not os.path.exists(path)]
+        if cached is not None and missing:
+            print(f"♻️  {cell['name']}: inputs unchanged, simulating again for {', '.join(missing)}")
+            cached = None
+        if cached is not None:
+            print(f"♻️  {cell['name']}: inputs unchanged, reused cached metrics")
+            instrumentation.count("cache_hits")
+            instrumentation.write_report(report_file, "run_sweep")
+            return cached["metrics"], cached["run"]
+
+    with instrumentation.stage("prepare_run"):
+        config_file = prepare_run(cell, sweep_dir, options["live"], options["compress"],
+                                  options["edges"] and options["edges"]["period"])
+    detector_results, run_info, tables = simulate(config_file, options)
+    if run_info.get("converged"):
+        print(f"⏱️  {cell['name']}: converged at t={run_info['stop_time']:.0f}s")
+
+    # Live runs leave no detector XML behind
+    detector_file, tripinfo_file, edge_file, routes_file = run_outputs(run_dir, options["compress"])
+    raw_files = [path for path in (detector_file, tripinfo_file, edge_file, routes_file) if os.path.exists(path)]
+
+    # Every run gets each direction's average trip delay (tripinfo timeLoss) as avg_delay, so
+    # sweep and optimize_signals.py runs of the same cell and seed share one cache entry
+    if os.path.exists(tripinfo_file):
+        from tripinfo_table import load_tripinfo, summarize_trips
+        with instrumentation.stage("trip_parse"):
+            trip_summary = summarize_trips(load_tripinfo(tripinfo_file, tables,
+                                                         routes_file if os.path.exists(routes_file) else None))
+        for direction, metrics in detector_results.items():
+            metrics["avg_delay"] = float(trip_summary["avg_delay"].get(direction, 0.0))
+
+    if options["archive"] and options["live"]:
+        print(f"Note: {cell['name']} ran live, no detector intervals to archive.")
+    if "archive" in artefacts:
+        from run_archive import write_run_archive
+        with instrumentation.stage("archive"):
+            write_run_archive(artefacts["archive"], detector_file, tripinfo_file, tables)
+
+    if options["time_series"] and options["live"]:
+        print(f"Note: {cell['name']} ran live, no detector intervals for a time series.")
+    if "time_series" in artefacts:
+        from time_series import detector_time_series, write_time_series
+        with instrumentation.stage("time_series"):
+            write_time_series(artefacts["time_series"], detector_time_series(detector_file, tables,
+                                                                             options["time_series"]["period"]))
+
+    if "edges" in artefacts:
+        with instrumentation.stage("edge_parse"):
+            write_edge_data(artefacts["edges"], read_edge_data(edge_file))
+
+    if key is not None:
+        with instrumentation.stage("cache_store"):
+            cache_store(key, {"metrics": detector_results, "run": run_info}, cache["dir"],
+                        raw_files if cache["raw"] else ())
+    instrumentation.write_report(report_file, "run_sweep")
+    return detector_results, run_info
+
+
+def store_result(conn, task, detector_results, run_info, sweep_dir, options):
+    """Add one finished task (a cell or one seed of it) to the results database
+
+    The run is keyed like the cache, so re-running an unchanged cell replaces
+    its row. Intervals and trips are stored when the database options ask for
+    them and the run directory still has the raw outputs.
+    """
+    database = options["database"]
+    run_dir = os.path.abspath(os.path.join(sweep_dir, task["name"]))
+    params, input_files = cell_key_inputs(task, options)
+    report_file = instrumentation.report_file_for(os.path.join(options["output_dir"] or run_dir, task["name"] + ".csv"))
+    timings = None
+    if os.path.exists(report_file):
+        with open(report_file) as file:
+            timings = json.load(file)
+
+    intervals = trips = None
+    detector_file, tripinfo_file, _, routes_file = run_outputs(run_dir, options["compress"])
+    if database["intervals"] and os.path.exists(detector_file):
+        from run_archive import read_detector_intervals
+        intervals = read_detector_intervals(detector_file)
+    if database["trips"] and os.path.exists(tripinfo_file):
+        from tripinfo_table import load_tripinfo
+        trips = load_tripinfo(tripinfo_file, run_tables(run_dir), routes_file if os.path.exists(routes_file) else None)
+
+    with instrumentation.stage("db_store"):
+        store_run(conn, {
+            "run_key": cell_key(params, input_files),
+            "name": task["name"],
+            "scenario": task["scenario"],
+            "label": task["label"],
+            "cycle_time": task["cycle_time"],
+            "actuated": task["actuated"],
+            "seed": task.get("seed"),
+            "signal": task.get("signal"),
+            "input_hashes": {os.path.relpath(path, BASE_DIR): file_hash(path) for path in input_files},
+            "run_info": run_info,
+            "timings": timings,
+        }, detector_results, intervals, trips)
+
+
+def merge_replication(stats, detector_results):
+    """Fold one seed's per-direction results into running mean/variance"""
+    for direction, metrics in detector_results.items():
+        direction_stats = stats.setdefault(direction, {name: RunningStats() for name in METRICS})
+        for name in METRICS:
+            direction_stats[name].add(metrics[name])
+
+
+def replication_info(replication):
+    """Run info of a replicated cell: its seeds, how each one ended and the spread of the stop times"""
+    seeds = sorted(replication["seeds"])
+    info = {"replications": len(seeds), "seeds": seeds}
+    runs = replication["runs"]
+    if any(runs.values()):
+        info["seed_runs"] = {str(seed): runs[seed] for seed in seeds}
+    stop_times = [runs[seed]["stop_time"] for seed in seeds if runs[seed].get("stop_time") is not None]
+    if "converged" in runs[seeds[0]]:
+        info["converged"] = sum(1 for seed in seeds if runs[seed]["converged"])
+    if stop_times:
+        info["stop_time"] = {"min": min(stop_times), "mean": sum(stop_times) / len(stop_times),
+                             "max": max(stop_times)}
+    return info
+
+
+def default_options(**overrides):
+    """Sweep-wide settings shared by every cell"""
+    options = {
+        "sumo_binary": "sumo",
+        "output_dir": None,
+        "cache": None,
+        "archive": False,
+        "time_series": None,
+        "live": False,
+        "convergence": None,
+        # Ask SUMO for gzipped detector/tripinfo output, several times smaller on disk
+        "compress": True,
+        # {"file", "intervals", "trips"}: also store every finished run in the results database
+        "database": None,
+        # {"period"}: also record edge mean data on every edge, saved as <name>_edges.npz
+        "edges": None,
+    }
+    options.update(overrides)
+    return options
+
+
+def run_sweep(cells, sweep_dir, options, workers=None, force=(), replications=1, base_seed=None):
+    """Run every cell in a process pool bounded by the core count
+
+    force lists the cell names to re-simulate even when cached, None forces
+    all. With replications > 1 every cell runs once per seed in parallel and
+    the seeds are merged with online mean/variance as they finish, so a
+    cell's CSV gets std-dev and CI columns without keeping the replicates.
+    """
+    workers = workers or os.cpu_count() or 1
+    output_dir = options["output_dir"] or sweep_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    tasks = expand_replications(cells, replications, base_seed)
+    by_name = {cell["name"]: cell for cell in cells}
+    pending = {}
+    for task in tasks:
+        if "cell_name" in task:
+            pending.setdefault(task["cell_name"], {"remaining": 0, "seeds": [], "stats": {}, "runs": {}})["remaining"] += 1
+
+    conn = None
+    if options["database"] is not None:
+        conn = connect(options["database"]["file"])
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_cell, task, sweep_dir, options,
+                               force is None or task.get("cell_name", task["name"]) in force): task
+                   for task in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            name = task.get("cell_name", task["name"])
+            try:
+                detector_results, run_info = future.result()
+            except Exception as error:
+                print(f"❌ {task['name']}: {error}")
+                detector_results, run_info = None, None
+            if conn is not None and detector_results is not None:
+                store_result(conn, task, detector_results, run_info, sweep_dir, options)
+
+            if name not in pending:
+                if detector_results is None:
+                    results[name] = None
+                    continue
+                output_csv = os.path.join(output_dir, name + ".csv")
+                write_traffic_csv(detector_results, output_csv)
+                write_run_info(task, run_info, output_csv)
+                print(f"Traffic data saved to {output_csv}")
+                results[name] = output_csv
+                continue
+
+            replication = pending[name]
+            replication["remaining"] -= 1
+            if detector_results is not None:
+                merge_replication(replication["stats"], detector_results)
+                replication["seeds"].append(task["seed"])
+                replication["runs"][task["seed"]] = run_info
+            if replication["remaining"]:
+                continue
+
+            # Every seed of the cell is in: write it and drop its statistics
+            del pending[name]
+            if not replication["seeds"]:
+                results[name] = None
+                continue
+            output_csv = os.path.join(output_dir, name + ".csv")
+            write_traffic_csv(None, output_csv, replication["stats"])
+            write_run_info(by_name[name], replication_info(replication), output_csv)
+            print(f"Traffic data saved to {output_csv} ({len(replication['seeds'])} seeds)")
+            results[name] = output_csv
+
+    if conn is not None:
+        conn.close()
+    cache = options["cache"]
+    if cache is not None:
+        evict_cache(cache["dir"], cache["max_bytes"])
+
+    done = sum(1 for csv_file in results.values() if csv_file)
+    print(f"\n🚦 Sweep finished: {done}/{len(cells)} cells extracted.")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scenario x cycle time x actuation sweep in parallel.")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, help="scenario folders to simulate")
+    parser.add_argument("--cycles", nargs="+", type=int, default=CYCLE_TIMES, help="cycle times in seconds, any length")
+    parser.add_argument("--actuation", nargs="+", choices=["static", "actuated"], default=["static", "actuated"])
+    parser.add_argument("--sweep-dir", default=os.path.join(BASE_DIR, "sweep"), help="where the per-run directories are created")
+    parser.add_argument("--output-dir", default=os.path.join(BASE_DIR, "Data"), help="where the CSV data points are written")
+    parser.add_argument("--sumo-binary", default="sumo", help="simulator executable")
+    parser.add_argument("--workers", type=int, help="parallel runs (default: number of cores)")
+    parser.add_argument("--archive", action="store_true", help="also save each run's intervals and trips in <name>_archive/")
+    parser.add_argument("--time-series", action="store_true", help="also save each run's per-interval metrics as <name>_ts.npz")
+    parser.add_argument("--resample", choices=["5min", "15min"], help="average the time series over 5 or 15 minutes")
+    parser.add_argument("--no-compress", action="store_true", help="write plain detector/tripinfo XML instead of .xml.gz")
+    parser.add_argument("--edges", nargs="?", type=int, const=DEFAULT_EDGE_PERIOD, metavar="PERIOD",
+                        help=f"also record every edge's mean data per PERIOD s (default {DEFAULT_EDGE_PERIOD}) "
+                             "into <name>_edges.npz, see edge_congestion.py")
+    parser.add_argument("--live", action="store_true", help="collect the loops over TraCI instead of writing detector XML")
+    parser.add_argument("--replications", type=int, default=1, help="seeds per cell, merged into mean/std-dev/CI columns")
+    parser.add_argument("--seed", type=int, help="first SUMO seed (seeds are SEED, SEED+1, ...)")
+    parser.add_argument("--converge", type=float, metavar="TOL",
+                        help="stop each run once every direction's flow/density CI is within TOL of its mean (implies --live)")
+    parser.add_argument("--min-intervals", type=int, default=10, help="intervals per direction before convergence is checked")
+    parser.add_argument("--db", nargs="?", const=DB_FILE, metavar="FILE",
+                        help=f"also store every run in the SQLite results database (default {os.path.relpath(DB_FILE, BASE_DIR)})")
+    parser.add_argument("--db-intervals", action="store_true", help="with --db, also store every detector interval")
+    parser.add_argument("--db-trips", action="store_true", help="with --db, also store every trip record")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="content-addressed result cache")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20, help="evict least recently used entries above this size")
+    parser.add_argument("--cache-raw", action="store_true", help="also keep the raw detector/tripinfo XML in the cache")
+    parser.add_argument("--no-cache", action="store_true", help="always simulate, never read or write the cache")
+    parser.add_argument("--force", nargs="*", metavar="CELL", help="re-simulate these cells (e.g. AM_90_SAtrue) even if cached; no names forces all")
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    instrumentation.enable(args.profile)
+
+    actuation = [mode == "actuated" for mode in args.actuation]
+    cells = expand_matrix(args.scenarios, args.cycles, actuation)
+    cache = None if args.no_cache else {"dir": args.cache_dir, "max_bytes": int(args.cache_max_mb * 2**20), "raw": args.cache_raw}
+    force = () if args.force is None else (args.force or None)
+    convergence = None
+    if args.converge is not None:
+        convergence = {"tolerance": args.converge, "min_intervals": args.min_intervals}
+    database = None
+    if args.db:
+        database = {"file": args.db, "intervals": args.db_intervals, "trips": args.db_trips}
+    time_series = {"period": RESAMPLE_PERIODS.get(args.resample)} if args.time_series else None
+    options = default_options(sumo_binary=args.sumo_binary, output_dir=args.output_dir, cache=cache,
+                              archive=args.archive, time_series=time_series, live=args.live or convergence is not None,
+                              convergence=convergence, compress=not args.no_compress, database=database,
+                              edges={"period": args.edges} if args.edges else None)
+    run_sweep(cells, args.sweep_dir, options, args.workers, force, args.replications, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import mmap
+import os
+import xml.etree.ElementTree as ET
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from compressed_io import detect_compression
+from extract_traffic_data import (DEFAULT_TABLES, add_interval, new_direction_sums, parse_detector_output,
+                                  summarize_direction_sums)
+from tripinfo_table import FLOAT_COLUMNS, LANE_COLUMNS, load_tripinfo, read_junction_routes, trip_table_from_columns
+
+# Files smaller than this are parsed serially, a pool would cost more than it saves
+MIN_SHARDED_BYTES = 16 * 2**20
+
+# Shards per worker, so a slow shard does not leave the other cores idle
+SHARDS_PER_WORKER = 4
+
+# Bytes handed to the pull parser at a time
+FEED_BLOCK = 4 * 2**20
+
+
+def shard_ranges(file, tag, shards):
+    """Split file into up to shards byte ranges, each starting at a <tag record
+
+    The file is scanned through mmap from evenly spaced offsets to the next
+    record start, so only a few bytes around each cut are read. The last range
+    ends before the root's closing tag.
+    """
+    marker = f"<{tag} ".encode()
+    with open(file, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        first = view.find(marker)
+        if first < 0:
+            return []
+        # Records are self-closing or close before the root does, so the last
+        # closing tag in the file is the root's
+        end = view.rfind(b"</")
+
+        starts = [first]
+        for i in range(1, shards):
+            start = view.find(marker, max(first + (end - first) * i // shards, starts[-1] + 1), end)
+            if start < 0:
+                break
+            if start > starts[-1]:
+                starts.append(start)
+    return list(zip(starts, starts[1:] + [end]))
+
+
+def _iter_shard(file, start, end, tag):
+    """Yield the <tag> elements in file[start:end], wrapped in a dummy root"""
+    parser = ET.XMLPullParser(events=("start", "end"))
+    parser.feed(b"<shard>")
+    root = None
+    with open(file, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        for offset in range(start, end, FEED_BLOCK):
+            parser.feed(view[offset:min(offset + FEED_BLOCK, end)])
+            for event, elem in parser.read_events():
+                if root is None:
+                    root = elem
+                elif event == "end" and elem.tag == tag:
+                    yield elem
+                    root.clear()
+    parser.feed(b"</shard>")
+    for event, elem in parser.read_events():
+        if event == "end" and elem.tag == tag:
+            yield elem
+    parser.close()
+
+
+def _detector_shard(file, start, end):
+    """Detector ids (as codes into names), flows and occupancies of one shard, in file order"""
+    names = {}
+    codes, flows, occupancies = array("i"), array("d"), array("d")
+    for elem in _iter_shard(file, start, end, "interval"):
+        codes.append(names.setdefault(elem.get("id"), len(names)))
+        flows.append(float(elem.get("flow", 0)))
+        occupancies.append(float(elem.get("occupancy", 0)))
+    return list(names), codes, flows, occupancies
+
+
+def _tripinfo_shard(file, start, end):
+    """Trip ids, float columns and lane columns (as codes into names) of one shard, in file order"""
+    ids = []
+    numbers = {name: array("d") for name in FLOAT_COLUMNS}
+    lanes = {name: ({}, array("i")) for name in LANE_COLUMNS}
+    for elem in _iter_shard(file, start, end, "tripinfo"):
+        get = elem.get
+        ids.append(get("id"))
+        for name in FLOAT_COLUMNS:
+            numbers[name].append(float(get(name, "nan")))
+        for name, (names, codes) in lanes.items():
+            codes.append(names.setdefault(get(name, ""), len(names)))
+    return numbers, {name: (list(names), codes) for name, (names, codes) in lanes.items()}, ids
+
+
+def _map_shards(worker, file, tag, workers, min_bytes=MIN_SHARDED_BYTES):
+    """Per-shard results in file order, or None when the file is not worth (or cannot be) sharded
+
+    A compressed stream has no record boundaries to seek to, so it is parsed serially.
+    """
+    workers = workers or os.cpu_count()
+    if workers < 2 or os.path.getsize(file) < min_bytes or detect_compression(file):
+        return None
+    ranges = shard_ranges(file, tag, workers * SHARDS_PER_WORKER)
+    if len(ranges) < 2:
+        return None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, *zip(*[(file, start, end) for start, end in ranges])))
+
+
+def parse_detector_output_sharded(file, tables=DEFAULT_TABLES, workers=None, min_bytes=MIN_SHARDED_BYTES):
+    """parse_detector_output on all cores
+
+    Shards are parsed in parallel, then their intervals are folded into the
+    running sums in file order, so every float addition happens in the same
+    order as in the serial parser and the result is bit-for-bit identical.
+    """
+    shards = _map_shards(_detector_shard, file, "interval", workers, min_bytes)
+    if shards is None:
+        return parse_detector_output(file, tables)
+
+    data = new_direction_sums(tables)
+    for names, codes, flows, occupancies in shards:
+        for code, flow, occupancy in zip(codes, flows, occupancies):
+            add_interval(data, names[code], flow, occupancy, tables)
+    instrumentation.count_bytes(file)
+    instrumentation.count("intervals", sum(sums["flow_count"] for sums in data.values()))
+    return summarize_direction_sums(data, tables)
+
+
+def load_tripinfo_sharded(file, tables=DEFAULT_TABLES, workers=None, routes_file=None, min_bytes=MIN_SHARDED_BYTES):
+    """load_tripinfo on all cores, the shards' columns concatenated in file order"""
+    shards = _map_shards(_tripinfo_shard, file, "tripinfo", workers, min_bytes)
+    if shards is None:
+        return load_tripinfo(file, tables, routes_file)
+
+    numbers = {name: np.concatenate([np.frombuffer(shard[0][name], dtype=np.float64) for shard in shards])
+               for name in FLOAT_COLUMNS}
+
+    # Re-code every shard's lane names against the sorted union, as pd.Categorical would
+    lanes = {}
+    for name in LANE_COLUMNS:
+        categories = sorted(set().union(*(shard[1][name][0] for shard in shards)))
+        position = {lane: i for i, lane in enumerate(categories)}
+        codes = np.concatenate([
+            np.array([position[lane] for lane in names], dtype=np.int32)[np.frombuffer(shard_codes, dtype=np.int32)]
+            if len(shard_codes) else np.empty(0, dtype=np.int32)
+            for names, shard_codes in (shard[1][name] for shard in shards)
+        ])
+        lanes[name] = pd.Categorical.from_codes(codes, categories)
+    instrumentation.count_bytes(file)
+    instrumentation.count("trips", len(numbers["depart"]))
+    ids = [trip_id for shard in shards for trip_id in shard[2]]
+    junction = read_junction_routes(routes_file, tables) if routes_file else None
+    return trip_table_from_columns(numbers, lanes, tables, ids, junction)
@@ -0,0 +1,134 @@
+import argparse
+import os
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
+
+from compressed_io import open_input
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The one Lyons network every scenario runs on; signal timings come from overlays
+BASE_NET = os.path.join(BASE_DIR, "AM", "lyons.net.xml")
+
+# Green extension bounds of the actuated programs, as in the hand-made actuated nets
+MIN_DUR = 5
+MAX_DUR = 50
+
+
+def read_tl_programs(net_file=BASE_NET):
+    """Traffic light programs of a net: [{"id", "type", "programID", "offset", "phases": [attrib, ...]}]
+
+    SUMO writes every tlLogic before the junctions, so the scan stops at the
+    first junction instead of reading the rest of the file.
+    """
+    programs = []
+    with open_input(net_file) as stream:
+        context = ET.iterparse(stream, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event == "start" and elem.tag == "junction":
+                break
+            if event == "end" and elem.tag == "tlLogic":
+                program = dict(elem.attrib)
+                program["phases"] = [dict(phase.attrib) for phase in elem.iter("phase")]
+                programs.append(program)
+                root.clear()
+    return programs
+
+
+def is_green(phase):
+    """A phase giving some movement the green, as opposed to a yellow or all-red transition"""
+    state = phase["state"]
+    return "y" not in state.lower() and ("G" in state or "g" in state)
+
+
+def scale_program(program, cycle_time, actuated, min_dur=MIN_DUR, max_dur=MAX_DUR, splits=None):
+    """Program with its green phases rescaled so the whole cycle lasts cycle_time seconds
+
+    Yellow and all-red phases keep their durations; the remaining time is
+    shared between the greens in proportion to the base program (or to splits,
+    one weight per green phase). Durations are whole seconds that add up to
+    cycle_time exactly. Actuated programs get minDur/maxDur on every green.
+    """
+    phases = program["phases"]
+    greens = [i for i, phase in enumerate(phases) if is_green(phase)]
+    fixed = sum(float(phase["duration"]) for i, phase in enumerate(phases) if i not in greens)
+    available = cycle_time - fixed
+    if not greens or available < len(greens):
+        raise ValueError(f"Cycle of {cycle_time}s leaves no green time for tlLogic {program['id']} "
+                         f"({fixed:g}s of transitions)")
+
+    weights = list(splits) if splits is not None else [float(phases[i]["duration"]) for i in greens]
+    if len(weights) != len(greens):
+        raise ValueError(f"tlLogic {program['id']} has {len(greens)} green phases, got {len(weights)} splits")
+    total = sum(weights)
+    durations = [max(1, round(available * weight / total)) for weight in weights]
+    durations[-1] += round(available) - sum(durations)
+
+    scaled = []
+    for i, phase in enumerate(phases):
+        phase = {"duration": phase["duration"], "state": phase["state"]}
+        if i in greens:
+            phase["duration"] = str(durations[greens.index(i)])
+            if actuated:
+                phase["minDur"] = f"{min_dur:g}"
+                phase["maxDur"] = f"{max_dur:g}"
+        scaled.append(phase)
+
+    return {
+        "id": program["id"],
+        "type": "actuated" if actuated else "static",
+        "programID": program_id(cycle_time, actuated),
+        "offset": program.get("offset", "0"),
+        "phases": scaled,
+    }
+
+
+def program_id(cycle_time, actuated):
+    """Distinct from the net's own program, so SUMO switches to the overlay when it is loaded"""
+    return f"c{cycle_time}_{'actuated' if actuated else 'static'}"
+
+
+def write_overlay(output_file, programs):
+    """Write tlLogic programs as a SUMO additional file"""
+    lines = ["<additional>"]
+    for program in programs:
+        attributes = " ".join(f"{key}={quoteattr(str(program[key]))}" for key in ("id", "type", "programID", "offset"))
+        lines.append(f"    <tlLogic {attributes}>")
+        for phase in program["phases"]:
+            lines.append("        <phase " + " ".join(f"{key}={quoteattr(value)}" for key, value in phase.items()) + "/>")
+        lines.append("    </tlLogic>")
+    lines.append("</additional>")
+    with open(output_file, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    return output_file
+
+
+def signal_overlay(output_file, cycle_time, actuated, net_file=BASE_NET, min_dur=MIN_DUR, max_dur=MAX_DUR,
+                   splits=None):
+    """Write the overlay giving every traffic light of net_file the requested cycle and control type"""
+    programs = [scale_program(program, cycle_time, actuated, min_dur, max_dur, splits)
+                for program in read_tl_programs(net_file)]
+    return write_overlay(output_file, programs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write tlLogic overlays of the base net for any cycle length.")
+    parser.add_argument("--cycles", nargs="+", type=int, required=True, help="cycle lengths in seconds")
+    parser.add_argument("--actuation", nargs="+", choices=["static", "actuated"], default=["static", "actuated"])
+    parser.add_argument("--net", default=BASE_NET, help="net file to take the programs from")
+    parser.add_argument("--output-dir", default=".", help="where to write lyons_<cycle>_<mode>.tls.xml")
+    parser.add_argument("--min-dur", type=float, default=MIN_DUR, help="minimum green of actuated phases")
+    parser.add_argument("--max-dur", type=float, default=MAX_DUR, help="maximum green of actuated phases")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for cycle_time in args.cycles:
+        for mode in args.actuation:
+            output_file = os.path.join(args.output_dir, f"lyons_{cycle_time}_{mode}.tls.xml")
+            signal_overlay(output_file, cycle_time, mode == "actuated", args.net, args.min_dur, args.max_dur)
+            print(f"✅ {output_file}")
+
+
+if __name__ == "__main__":
+    main()
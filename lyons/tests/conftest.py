@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scripts import each other as siblings of lyons/ (and of lyons/Data/ for the aggregation)
+LYONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LYONS_DIR)
+sys.path.insert(0, os.path.join(LYONS_DIR, "Data"))
@@ -0,0 +1,48 @@
+import os
+import shutil
+
+import pandas as pd
+
+from dataOrganizer import process_csv_files
+from extract_traffic_data import match_run_csv
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data")
+
+
+def copy_runs(directory):
+    runs = [name for name in os.listdir(DATA_DIR) if match_run_csv(name)]
+    for name in runs:
+        shutil.copyfile(os.path.join(DATA_DIR, name), os.path.join(directory, name))
+    return runs
+
+
+def read_final(directory):
+    return pd.read_csv(os.path.join(directory, "final_data.csv"))
+
+
+def test_missing_manifest_rebuilds_instead_of_appending(tmp_path):
+    runs = copy_runs(tmp_path)
+    process_csv_files(str(tmp_path), "final_data.csv")
+    rows = len(read_final(tmp_path))
+    assert read_final(tmp_path)["Run"].nunique() == len(runs)
+
+    # A fresh checkout: final_data.csv is committed, its manifest is not
+    os.remove(tmp_path / "final_data.csv.manifest.json")
+    process_csv_files(str(tmp_path), "final_data.csv")
+
+    final = read_final(tmp_path)
+    assert len(final) == rows
+    assert not final.duplicated().any()
+
+
+def test_new_run_is_appended_once(tmp_path):
+    copy_runs(tmp_path)
+    process_csv_files(str(tmp_path), "final_data.csv")
+    rows = len(read_final(tmp_path))
+
+    shutil.copyfile(os.path.join(DATA_DIR, "AM_70_SAtrue.csv"), tmp_path / "AM_1_SAtrue.csv")
+    process_csv_files(str(tmp_path), "final_data.csv")
+    process_csv_files(str(tmp_path), "final_data.csv")
+
+    final = read_final(tmp_path)
+    assert len(final) == rows + (final["Run"] == "AM_1_SAtrue").sum() == rows + 4
@@ -0,0 +1,25 @@
+import numpy as np
+
+from edge_congestion import read_edge_data
+
+
+def test_edges_and_intervals_grow_past_the_initial_arrays(tmp_path):
+    # 100 edges over 40 intervals, each edge only seen from interval (edge % 40) on
+    lines = ["<meandata>"]
+    for step in range(40):
+        lines.append(f'<interval begin="{step * 300}" end="{(step + 1) * 300}" id="edges">')
+        lines += [f'<edge id="e{edge}" density="{edge + step}" speed="10" timeLoss="1"/>'
+                  for edge in range(100) if edge % 40 <= step]
+        lines.append('<edge id=":junction_0" density="99"/>')
+        lines.append("</interval>")
+    lines.append("</meandata>")
+    (tmp_path / "edges.xml").write_text("\n".join(lines))
+
+    data = read_edge_data(str(tmp_path / "edges.xml"))
+
+    assert data["density"].shape == (100, 40) and data["density"].dtype == np.float32
+    assert data["period"] == 300
+    edge = list(data["edges"]).index("e45")
+    assert np.isnan(data["speed"][edge, 4]) and data["density"][edge, 4] == 0
+    assert data["density"][edge, 5] == 50 and data["speed"][edge, 5] == 10
+    assert data["timeLoss"].sum() == sum(40 - edge % 40 for edge in range(100))
@@ -0,0 +1,58 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from extract_traffic_data import LANE_GROUPS, LANE_LENGTHS, parse_detector_output
+
+LYONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reference_results(file, skip_zero_density):
+    """The per-scenario dataExtractingScript.py parse the unified parser replaced
+
+    The AM and PM scripts gave a zero-density interval the direction's
+    average density as spacing, low_traffic_flow skipped it.
+    """
+    data = {direction: {"flow_rate": [], "density": []} for direction in LANE_GROUPS}
+    for interval in ET.parse(file).getroot().findall("interval"):
+        for direction, lanes in LANE_GROUPS.items():
+            for lane_id in lanes:
+                if interval.get("id") == lane_id:
+                    occupancy = float(interval.get("occupancy", 0))
+                    data[direction]["flow_rate"].append(float(interval.get("flow", 0)))
+                    data[direction]["density"].append((occupancy / 100) * (1000 / LANE_LENGTHS[lane_id]))
+
+    results = {}
+    for direction, values in data.items():
+        avg_flow = sum(values["flow_rate"]) / len(values["flow_rate"]) if values["flow_rate"] else 0
+        avg_density = sum(values["density"]) / len(values["density"]) if values["density"] else 0
+        distances = [LANE_LENGTHS[LANE_GROUPS[direction][0]] * 2 / (density or avg_density)
+                     for density in values["density"] if density or not skip_zero_density]
+        avg_distance = sum(distances) / len(distances) if distances else 0
+        results[direction] = {"avg_flow": avg_flow, "avg_density": avg_density, "avg_distance": avg_distance}
+    return results
+
+
+@pytest.mark.parametrize("scenario", ["AM", "PM", "low_traffic_flow"])
+def test_flow_and_density_match_per_scenario_scripts(scenario):
+    detector_file = os.path.join(LYONS_DIR, scenario, "detector_output.xml")
+    expected = reference_results(detector_file, skip_zero_density=scenario == "low_traffic_flow")
+
+    results = parse_detector_output(detector_file)
+    assert list(results) == list(expected)
+    for direction, metrics in expected.items():
+        assert results[direction]["avg_flow"] == metrics["avg_flow"]
+        assert results[direction]["avg_density"] == metrics["avg_density"]
+
+
+@pytest.mark.parametrize("scenario", ["AM", "PM", "low_traffic_flow"])
+def test_distance_skips_zero_density_intervals(scenario):
+    # Matches the low_traffic_flow script; AM and PM used to count zero-density
+    # intervals at the average density, which the unified parser no longer does
+    detector_file = os.path.join(LYONS_DIR, scenario, "detector_output.xml")
+    expected = reference_results(detector_file, skip_zero_density=True)
+
+    results = parse_detector_output(detector_file)
+    for direction, metrics in expected.items():
+        assert results[direction]["avg_distance"] == pytest.approx(metrics["avg_distance"], rel=1e-12)
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from result_cache import atomic_output, derived_cache_file
+
+
+def test_derived_cache_file_follows_contents_and_version(tmp_path):
+    source = tmp_path / "edge_output.xml"
+    source.write_text("<meandata/>")
+    first = derived_cache_file(str(tmp_path / "cache"), str(source), 1, ".npz")
+
+    assert derived_cache_file(str(tmp_path / "cache"), str(source), 2, ".npz") != first
+    source.write_text("<meandata></meandata>")
+    assert derived_cache_file(str(tmp_path / "cache"), str(source), 1, ".npz") != first
+
+
+def test_atomic_output_keeps_old_file_on_error(tmp_path):
+    target = tmp_path / "cache" / "index.json"
+    with atomic_output(str(target)) as tmp_file, open(tmp_file, "w") as file:
+        assert tmp_file.endswith(".json")
+        file.write("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_output(str(target)) as tmp_file, open(tmp_file, "w") as file:
+            file.write("partial")
+            raise RuntimeError("interrupted")
+
+    assert target.read_text() == "old"
+    assert os.listdir(target.parent) == ["index.json"]
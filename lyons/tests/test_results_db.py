@@ -0,0 +1,25 @@
+from results_db import connect, query_summary, store_run
+
+
+def store(conn, run_key, created_at, flow, seed=None):
+    run = {"run_key": run_key, "name": "AM_90_SAtrue", "scenario": "AM", "label": "AM", "cycle_time": 90,
+           "actuated": True, "seed": seed, "created_at": created_at}
+    store_run(conn, run, {"Northbound": {"avg_flow": flow, "avg_density": 1.0, "avg_distance": 100.0}})
+
+
+def test_summary_uses_the_latest_run_unless_history(tmp_path):
+    db_file = str(tmp_path / "results.sqlite")
+    conn = connect(db_file)
+    # The same cell before and after an input change, plus a second seed
+    store(conn, "old-inputs", "2026-09-01T00:00:00", 100.0)
+    store(conn, "new-inputs", "2026-10-01T00:00:00", 200.0)
+    store(conn, "new-inputs-s1", "2026-10-01T00:00:00", 300.0, seed=1)
+    conn.close()
+
+    latest = query_summary(db_file)
+    assert latest["runs"].tolist() == [2]
+    assert latest["avg_flow_rate"].tolist() == [250.0]
+
+    history = query_summary(db_file, history=True)
+    assert history["runs"].tolist() == [3]
+    assert query_summary(db_file, "r.seed IS NULL")["avg_flow_rate"].tolist() == [200.0]
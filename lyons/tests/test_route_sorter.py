@@ -0,0 +1,32 @@
+import tempfile
+import xml.etree.ElementTree as ET
+
+import route_sorter
+
+
+def write_routes_file(path, departs):
+    trips = "".join(f'    <trip id="t{i}" depart="{depart:.2f}" from="a" to="b"/>\n' for i, depart in enumerate(departs))
+    path.write_text(f'<routes>\n    <vType id="car"/>\n{trips}</routes>\n')
+
+
+def read_departs(path):
+    return [(elem.get("id"), float(elem.get("depart"))) for elem in ET.parse(path).getroot() if elem.get("depart")]
+
+
+def test_sorted_input_is_streamed_without_spilling(tmp_path, monkeypatch):
+    write_routes_file(tmp_path / "in.rou.xml", range(50))
+    monkeypatch.setattr(tempfile, "mkdtemp", lambda **kwargs: (_ for _ in ()).throw(AssertionError("spilled")))
+
+    assert route_sorter.sort_route_file(str(tmp_path / "in.rou.xml"), str(tmp_path / "out.rou.xml"), 10) == 51
+    assert read_departs(tmp_path / "out.rou.xml") == read_departs(tmp_path / "in.rou.xml")
+
+
+def test_unsorted_input_falls_back_to_the_external_sort(tmp_path):
+    departs = [5, 1, 3, 3, 0, 9, 2, 8, 7, 6, 4, 3]
+    write_routes_file(tmp_path / "in.rou.xml", departs)
+
+    assert route_sorter.sort_route_file(str(tmp_path / "in.rou.xml"), str(tmp_path / "in.rou.xml"), 4) == 13
+    result = read_departs(tmp_path / "in.rou.xml")
+    # Stable: equal departs keep their input order
+    assert result == sorted(((f"t{i}", float(depart)) for i, depart in enumerate(departs)), key=lambda trip: trip[1])
+    assert ET.parse(tmp_path / "in.rou.xml").getroot()[0].tag == "vType"
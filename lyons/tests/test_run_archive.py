@@ -0,0 +1,26 @@
+import os
+
+import numpy as np
+
+from extract_traffic_data import run_tables
+from run_archive import combine_runs, detector_table, load_run_archive, trip_table, write_run_archive
+from tripinfo_table import load_tripinfo
+
+AM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AM")
+
+
+def test_archive_columns_are_memory_mapped(tmp_path):
+    tables = run_tables(AM_DIR)
+    archive_dir = write_run_archive(str(tmp_path / "AM_90_SAfalse_archive"), os.path.join(AM_DIR, "detector_output.xml"),
+                                    os.path.join(AM_DIR, "tripinfo.xml"), tables)
+
+    with load_run_archive(archive_dir) as archive:
+        assert "detector/flow" in archive and "trip/direction_code" in archive
+        assert isinstance(archive["detector/flow"], np.memmap)
+        trips = trip_table(archive)
+        intervals = detector_table(archive)
+
+    expected = load_tripinfo(os.path.join(AM_DIR, "tripinfo.xml"), tables)
+    assert trips["duration"].tolist() == expected["duration"].tolist()
+    assert trips["direction"].astype(str).tolist() == expected["direction"].astype(str).tolist()
+    assert len(intervals) == len(combine_runs([archive_dir]))
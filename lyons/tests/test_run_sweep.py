@@ -0,0 +1,104 @@
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+import run_sweep
+from run_sweep import default_options, expand_matrix
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PM")
+
+# Stands in for sumo: copies the recorded PM outputs to the names the run's
+# config asks for, with every flow raised by 10 x the seed, and logs its run directory
+STUB = """#!{python}
+import gzip, os, re, shutil, sys
+import xml.etree.ElementTree as ET
+
+config = ET.parse(sys.argv[2]).getroot()
+seed = config.find("random_number/seed")
+seed = int(seed.get("value")) if seed is not None else 0
+detector_file = next(ET.parse("detectors.add.xml").getroot().iter("inductionLoop")).get("file")
+with open({detectors!r}) as file:
+    detectors = re.sub(r'flow="([0-9.]+)"', lambda m: 'flow="%s"' % (float(m.group(1)) + 10 * seed), file.read())
+with open({tripinfo!r}) as file:
+    tripinfo = file.read()
+for name, text in ((detector_file, detectors), (config.find("output/tripinfo-output").get("value"), tripinfo)):
+    with (gzip.open if name.endswith(".gz") else open)(name, "wt") as file:
+        file.write(text)
+with open({log!r}, "a") as file:
+    file.write(os.getcwd() + "\\n")
+"""
+
+
+@pytest.fixture
+def sumo(tmp_path):
+    """Path of a stub simulator and a function returning the run directories it was started in"""
+    log = tmp_path / "calls.log"
+    stub = tmp_path / "sumo"
+    stub.write_text(STUB.format(python=sys.executable, log=str(log),
+                                detectors=os.path.join(SCENARIO_DIR, "detector_output.xml"),
+                                tripinfo=os.path.join(SCENARIO_DIR, "tripinfo.xml")))
+    stub.chmod(0o755)
+    return str(stub), lambda: log.read_text().split() if log.exists() else []
+
+
+def sweep(tmp_path, sumo_binary, cells, cache=True, **kwargs):
+    options = default_options(sumo_binary=sumo_binary, output_dir=str(tmp_path / "out"),
+                              cache={"dir": str(tmp_path / "cache"), "max_bytes": 2**30, "raw": False}
+                              if cache else None)
+    return run_sweep.run_sweep(cells, str(tmp_path / "sweep"), options, workers=1, **kwargs)
+
+
+def read_rows(csv_file):
+    with open(csv_file) as file:
+        return {row["Direction"]: row for row in csv.DictReader(file)}
+
+
+def test_every_cell_runs_in_its_own_directory(tmp_path, sumo):
+    sumo_binary, calls = sumo
+    cells = expand_matrix(["PM"], [70, 90], [False])
+
+    results = sweep(tmp_path, sumo_binary, cells, cache=False)
+
+    run_dirs = sorted(calls())
+    assert run_dirs == sorted(str(tmp_path / "sweep" / cell["name"]) for cell in cells)
+    for run_dir in run_dirs:
+        assert os.path.exists(os.path.join(run_dir, "simple.sumocfg"))
+        assert os.path.exists(os.path.join(run_dir, "detector_output.xml.gz"))
+    assert all(os.path.exists(results[cell["name"]]) for cell in cells)
+
+
+def test_cache_hit_miss_and_force(tmp_path, sumo):
+    sumo_binary, calls = sumo
+    cells = expand_matrix(["PM"], [90], [False])
+
+    first = read_rows(sweep(tmp_path, sumo_binary, cells)["PM_90_SAfalse"])
+    second = read_rows(sweep(tmp_path, sumo_binary, cells)["PM_90_SAfalse"])
+    assert len(calls()) == 1
+    assert first == second
+
+    sweep(tmp_path, sumo_binary, cells, force=["PM_90_SAfalse"])
+    assert len(calls()) == 2
+    sweep(tmp_path, sumo_binary, expand_matrix(["PM"], [90], [True]))
+    assert len(calls()) == 3
+
+
+def test_replications_are_merged_per_cell(tmp_path, sumo):
+    sumo_binary, calls = sumo
+    cells = expand_matrix(["PM"], [90], [False])
+
+    single = read_rows(sweep(tmp_path, sumo_binary, cells, cache=False, base_seed=0)["PM_90_SAfalse"])
+    merged_csv = sweep(tmp_path, sumo_binary, cells, cache=False, replications=2, base_seed=0)["PM_90_SAfalse"]
+    merged = read_rows(merged_csv)
+
+    assert len(calls()) == 3
+    with open(merged_csv[:-len(".csv")] + ".json") as file:
+        info = json.load(file)
+    assert info["replications"] == 2 and info["seeds"] == [0, 1]
+    for direction, row in merged.items():
+        assert row["Replications"] == "2"
+        # Seed 1 adds 10 veh/h to every interval, so the mean of both seeds is 5 higher
+        assert float(row["Average Flow Rate (veh/hr)"]) == pytest.approx(
+            float(single[direction]["Average Flow Rate (veh/hr)"]) + 5)
@@ -0,0 +1,44 @@
+import os
+
+import pandas as pd
+import pytest
+
+import sharded_parse
+from extract_traffic_data import parse_detector_output, run_tables
+from sharded_parse import SHARDS_PER_WORKER, load_tripinfo_sharded, parse_detector_output_sharded, shard_ranges
+from tripinfo_table import load_tripinfo
+
+LYONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ["AM", "PM", "low_traffic_flow"]
+WORKERS = 3
+
+
+@pytest.fixture
+def no_serial_fallback(monkeypatch):
+    """Fail if the sharded parsers fall back to the serial ones"""
+    def serial(*args, **kwargs):
+        raise AssertionError("file was parsed serially")
+    monkeypatch.setattr(sharded_parse, "parse_detector_output", serial)
+    monkeypatch.setattr(sharded_parse, "load_tripinfo", serial)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_sharded_detector_output_matches_serial(scenario, no_serial_fallback):
+    directory = os.path.join(LYONS_DIR, scenario)
+    detector_file = os.path.join(directory, "detector_output.xml")
+    tables = run_tables(directory)
+    assert len(shard_ranges(detector_file, "interval", WORKERS * SHARDS_PER_WORKER)) > 1
+
+    expected = parse_detector_output(detector_file, tables)
+    assert parse_detector_output_sharded(detector_file, tables, workers=WORKERS, min_bytes=0) == expected
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_sharded_tripinfo_matches_serial(scenario, no_serial_fallback):
+    directory = os.path.join(LYONS_DIR, scenario)
+    tripinfo_file = os.path.join(directory, "tripinfo.xml")
+    tables = run_tables(directory)
+    assert len(shard_ranges(tripinfo_file, "tripinfo", WORKERS * SHARDS_PER_WORKER)) > 1
+
+    expected = load_tripinfo(tripinfo_file, tables)
+    pd.testing.assert_frame_equal(load_tripinfo_sharded(tripinfo_file, tables, workers=WORKERS, min_bytes=0), expected)
@@ -0,0 +1,58 @@
+import os
+import types
+
+import traci_collector
+from convergence import ConvergenceMonitor
+from extract_traffic_data import DEFAULT_TABLES
+
+DETECTORS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AM", "detectors.add.xml")
+
+
+def fake_traci(steps=10000):
+    """A traci stand-in where every loop sees one new vehicle per 1 s step at 10% occupancy"""
+    tc = types.SimpleNamespace(LAST_STEP_VEHICLE_ID_LIST=0, LAST_STEP_OCCUPANCY=1, VAR_TIME=2,
+                               VAR_MIN_EXPECTED_VEHICLES=3)
+    state = {"time": 0, "loops": [], "closed": False}
+
+    def step():
+        state["time"] += 1
+
+    traci = types.SimpleNamespace(
+        start=lambda cmd: None,
+        close=lambda: state.update(closed=True),
+        simulationStep=step,
+        inductionloop=types.SimpleNamespace(
+            subscribe=lambda loop_id, variables: state["loops"].append(loop_id),
+            getAllSubscriptionResults=lambda: {loop_id: {0: [f"{loop_id}_{state['time']}"], 1: 10.0}
+                                               for loop_id in state["loops"]}),
+        simulation=types.SimpleNamespace(
+            subscribe=lambda variables: None,
+            getSubscriptionResults=lambda: {2: float(state["time"]), 3: int(state["time"] < steps)}),
+    )
+    return traci, tc, state
+
+
+def test_collect_stops_once_converged(monkeypatch):
+    traci, tc, state = fake_traci()
+    monkeypatch.setattr(traci_collector, "traci", traci)
+    monkeypatch.setattr(traci_collector, "tc", tc, raising=False)
+    # Two loops per direction: six intervals are in after three 60 s periods
+    monitor = ConvergenceMonitor(DEFAULT_TABLES, tolerance=0.05, min_intervals=6)
+
+    results, end_time = traci_collector.collect(["sumo"], DETECTORS, DEFAULT_TABLES, monitor)
+
+    assert monitor.stop_time == end_time == 180.0
+    assert state["closed"]
+    for direction in DEFAULT_TABLES["groups"]:
+        assert results[direction]["avg_flow"] == 3600.0
+
+
+def test_collect_runs_to_the_end_without_monitor(monkeypatch):
+    traci, tc, state = fake_traci(steps=300)
+    monkeypatch.setattr(traci_collector, "traci", traci)
+    monkeypatch.setattr(traci_collector, "tc", tc, raising=False)
+
+    results, end_time = traci_collector.collect(["sumo"], DETECTORS, DEFAULT_TABLES)
+
+    assert end_time == 300.0
+    assert state["closed"]
@@ -0,0 +1,125 @@
+import numpy as np
+
+from extract_traffic_data import DEFAULT_TABLES
+from run_archive import read_detector_intervals
+
+SERIES_METRICS = ["flow", "density", "spacing"]
+
+
+def direction_time_series(intervals, tables=DEFAULT_TABLES, period=None):
+    """Per-direction flow, density and spacing for every interval (or resampling period) of a run
+
+    intervals are the detector columns of read_detector_intervals. The
+    metrics are the ones parse_detector_output averages over the whole run,
+    here averaged per time bin with bincount: mean flow (veh/h) and density
+    (veh/km) over the direction's detector intervals in the bin, and spacing
+    (m) from the mean inverse density of the non-empty intervals.
+
+    Returns a dict of arrays: time (bin starts, s), directions, flow, density
+    and spacing of shape (directions, bins), plus count and nonzero, the
+    intervals behind each value, which let resample_series merge bins exactly.
+    """
+    directions = list(tables["groups"])
+    names = intervals["detector_names"]
+    detector_direction = np.array([directions.index(tables["directions"][name])
+                                   if name in tables["directions"] else -1 for name in names], dtype=np.int64)
+    detector_length = np.array([tables["lengths"].get(name, np.nan) for name in names], dtype=np.float64)
+
+    code = intervals["detector_code"]
+    keep = detector_direction[code] >= 0
+    direction = detector_direction[code][keep]
+    begin = intervals["begin"][keep]
+    flow = intervals["flow"][keep]
+    density = (intervals["occupancy"][keep] / 100) * (1000 / detector_length[code][keep])
+
+    if period is None:
+        period = float(np.median(intervals["end"] - intervals["begin"])) if len(begin) else 60.0
+    bins = np.floor(begin / period).astype(np.int64)
+    first = bins.min() if len(bins) else 0
+    n_bins = int(bins.max() - first + 1) if len(bins) else 0
+    index = direction * n_bins + (bins - first)
+    size = len(directions) * n_bins
+
+    def per_bin(weights=None):
+        return np.bincount(index, weights, minlength=size).reshape(len(directions), n_bins)
+
+    count = per_bin()
+    nonzero_mask = density > 0
+    nonzero = np.bincount(index[nonzero_mask], minlength=size).reshape(len(directions), n_bins)
+    inverse = np.bincount(index[nonzero_mask], 1 / density[nonzero_mask], minlength=size).reshape(len(directions),
+                                                                                                  n_bins)
+
+    # Same spacing factor as summarize_direction_sums
+    spacing_factor = np.array([tables["lengths"][tables["groups"][name][0]] * 2 if tables["groups"][name] else np.nan
+                               for name in directions])[:, None]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "time": (first + np.arange(n_bins)) * float(period),
+            "period": np.float64(period),
+            "directions": np.array(directions, dtype=str),
+            "flow": per_bin(flow) / count,
+            "density": per_bin(density) / count,
+            "spacing": spacing_factor * inverse / nonzero,
+            "count": count,
+            "nonzero": nonzero,
+        }
+
+
+def resample_series(series, period):
+    """Merge the bins of a time series into coarser periods (e.g. 300 s), weighting by interval counts"""
+    bins = np.floor(series["time"] / period).astype(np.int64)
+    if not len(bins):
+        return dict(series, period=np.float64(period))
+    groups, group = np.unique(bins, return_inverse=True)
+
+    def merge(values):
+        merged = np.zeros((values.shape[0], len(groups)))
+        for row in range(values.shape[0]):
+            merged[row] = np.bincount(group, np.nan_to_num(values[row]), minlength=len(groups))
+        return merged
+
+    count = merge(series["count"])
+    nonzero = merge(series["nonzero"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "time": groups * float(period),
+            "period": np.float64(period),
+            "directions": series["directions"],
+            "flow": merge(series["flow"] * series["count"]) / count,
+            "density": merge(series["density"] * series["count"]) / count,
+            "spacing": merge(series["spacing"] * series["nonzero"]) / nonzero,
+            "count": count.astype(np.int64),
+            "nonzero": nonzero.astype(np.int64),
+        }
+
+
+def detector_time_series(detector_file, tables=DEFAULT_TABLES, period=None):
+    """Time series straight from a detector_output.xml"""
+    return direction_time_series(read_detector_intervals(detector_file), tables, period)
+
+
+def write_time_series(output_file, series):
+    np.savez(output_file, **series)
+    return output_file
+
+
+def load_time_series(file):
+    """A saved time series as a dict of arrays"""
+    with np.load(file, allow_pickle=False) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def time_series_frame(series, run=None):
+    """Long-format DataFrame (time, direction, flow, density, spacing) for plotting"""
+    import pandas as pd
+
+    n_directions, n_bins = series["flow"].shape
+    frame = pd.DataFrame({
+        "time": np.tile(series["time"], n_directions),
+        "direction": np.repeat(series["directions"], n_bins),
+        **{metric: series[metric].ravel() for metric in SERIES_METRICS},
+    })
+    if run is not None:
+        frame["run"] = run
+    return frame
@@ -0,0 +1,73 @@
+import xml.etree.ElementTree as ET
+
+from extract_traffic_data import DEFAULT_TABLES, add_interval, new_direction_sums, summarize_direction_sums
+
+try:
+    import traci
+    import traci.constants as tc
+except ImportError:  # traci ships with SUMO ($SUMO_HOME/tools) or via `pip install traci`
+    traci = None
+
+# Aggregation period used when a loop does not set freq
+DEFAULT_PERIOD = 60.0
+
+
+def read_loop_periods(additional_file):
+    """Induction loop id -> aggregation period (freq) from detectors.add.xml"""
+    root = ET.parse(additional_file).getroot()
+    return {loop.get("id"): float(loop.get("freq", DEFAULT_PERIOD)) for loop in root.iter("inductionLoop")}
+
+
+def collect(sumo_cmd, additional_file, tables=DEFAULT_TABLES, on_interval=None):
+    """Run SUMO under TraCI and aggregate the induction loops online
+
+    Every loop is subscribed to its vehicle ids and occupancy, so each step
+    costs one round trip however many loops there are. Per loop and period
+    the distinct vehicles give the flow (veh/h) and the mean step occupancy
+    gives the occupancy (%), which are folded into the same running sums as
+    parse_detector_output. on_interval(detector_id, begin, end, flow,
+    occupancy) is called for every finished interval; returning True stops
+    the simulation early.
+
+    Returns (per-direction results, simulation time at the end of the run).
+    """
+    if traci is None:
+        raise ImportError("traci is not available: add $SUMO_HOME/tools to PYTHONPATH or `pip install traci`")
+
+    periods = read_loop_periods(additional_file)
+    data = new_direction_sums(tables)
+    intervals = {loop_id: {"begin": 0.0, "vehicles": set(), "occupancy": 0.0, "steps": 0} for loop_id in periods}
+
+    traci.start(sumo_cmd)
+    try:
+        for loop_id in periods:
+            traci.inductionloop.subscribe(loop_id, [tc.LAST_STEP_VEHICLE_ID_LIST, tc.LAST_STEP_OCCUPANCY])
+        traci.simulation.subscribe([tc.VAR_TIME, tc.VAR_MIN_EXPECTED_VEHICLES])
+
+        stop = False
+        now = 0.0
+        while not stop:
+            traci.simulationStep()
+            simulation = traci.simulation.getSubscriptionResults()
+            now = simulation[tc.VAR_TIME]
+
+            for loop_id, values in traci.inductionloop.getAllSubscriptionResults().items():
+                interval = intervals[loop_id]
+                interval["vehicles"].update(values[tc.LAST_STEP_VEHICLE_ID_LIST])
+                interval["occupancy"] += values[tc.LAST_STEP_OCCUPANCY]
+                interval["steps"] += 1
+
+                if now - interval["begin"] >= periods[loop_id]:
+                    flow = len(interval["vehicles"]) * 3600 / (now - interval["begin"])
+                    occupancy = interval["occupancy"] / interval["steps"]
+                    add_interval(data, loop_id, flow, occupancy, tables)
+                    if on_interval is not None and on_interval(loop_id, interval["begin"], now, flow, occupancy):
+                        stop = True
+                    intervals[loop_id] = {"begin": now, "vehicles": set(), "occupancy": 0.0, "steps": 0}
+
+            if simulation[tc.VAR_MIN_EXPECTED_VEHICLES] <= 0:
+                stop = True
+    finally:
+        traci.close()
+
+    return summarize_direction_sums(data, tables), now
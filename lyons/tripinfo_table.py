@@ -0,0 +1,154 @@
+import xml.etree.ElementTree as ET
+from array import array
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from compressed_io import open_input
+from extract_traffic_data import DEFAULT_TABLES
+
+# Typed columns kept from every <tripinfo> record
+FLOAT_COLUMNS = ["depart", "duration", "routeLength", "waitingTime", "timeLoss"]
+LANE_COLUMNS = ["departLane", "arrivalLane"]
+
+
+def lane_directions(tables=DEFAULT_TABLES):
+    """Lane id -> heading for every lane of the net
+
+    Taken from the lane tables when they were derived from a net file, else
+    from the base Lyons net, so every trip gets a direction and not only the
+    few that start or end on a detector lane.
+    """
+    if "lane_directions" in tables:
+        return tables["lane_directions"]
+    from network_index import load_lane_index
+    from signal_programs import BASE_NET
+    return {lane_id: lane["direction"] for lane_id, lane in load_lane_index(BASE_NET).items()}
+
+
+def detector_edges(tables=DEFAULT_TABLES):
+    """Edge id -> direction of the approaches the detectors sit on"""
+    return {tables["ids"][detector].rsplit("_", 1)[0]: direction
+            for detector, direction in tables["directions"].items()}
+
+
+def read_junction_routes(file, tables=DEFAULT_TABLES):
+    """Vehicle id -> approach direction of every vehicle whose route crosses a detector edge
+
+    file is SUMO's vehroute output; with rerouting the last route of a
+    vehicle is the one it drove.
+    """
+    approaches = detector_edges(tables)
+    junction = {}
+    with open_input(file) as stream:
+        context = ET.iterparse(stream, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end" or elem.tag != "vehicle":
+                continue
+            routes = elem.findall(".//route")
+            if routes:
+                for edge in routes[-1].get("edges", "").split():
+                    if edge in approaches:
+                        junction[elem.get("id")] = approaches[edge]
+                        break
+            root.clear()
+    return junction
+
+
+def load_tripinfo(file, tables=DEFAULT_TABLES, routes_file=None):
+    """Stream tripinfo.xml into a columnar DataFrame, one row per trip
+
+    Numeric attributes are collected into typed arrays and lane ids into
+    categoricals, so the table costs a few bytes per trip and every later
+    step is vectorized. With the run's vehroute output as routes_file the
+    trips crossing the junction are marked too (see trip_table_from_columns).
+    """
+    numbers = {name: array("d") for name in FLOAT_COLUMNS}
+    lanes = {name: [] for name in LANE_COLUMNS}
+    ids = []
+    instrumentation.count_bytes(file)
+
+    with open_input(file) as stream:
+        context = ET.iterparse(stream, events=("start", "end"))
+        _, root = next(context)
+
+        for event, elem in context:
+            if event != "end" or elem.tag != "tripinfo":
+                continue
+
+            get = elem.get
+            ids.append(get("id"))
+            for name in FLOAT_COLUMNS:
+                numbers[name].append(float(get(name, "nan")))
+            for name in LANE_COLUMNS:
+                lanes[name].append(get(name, ""))
+
+            root.clear()
+
+    instrumentation.count("trips", len(numbers["depart"]))
+    lanes = {name: pd.Categorical(values) for name, values in lanes.items()}
+    junction = read_junction_routes(routes_file, tables) if routes_file else None
+    return trip_table_from_columns(numbers, lanes, tables, ids, junction)
+
+
+def trip_table_from_columns(numbers, lanes, tables=DEFAULT_TABLES, ids=None, junction=None):
+    """Trip table from float columns and lane categoricals, adding each trip's direction
+
+    direction is the heading of the trip's departure lane (else its arrival
+    lane) in the net. With junction (vehicle id -> approach, from
+    read_junction_routes) junction_direction gives the approach each trip
+    took through the signalised junction, NaN for trips that never cross it.
+    """
+    table = pd.DataFrame({name: np.asarray(values, dtype=np.float64) for name, values in numbers.items()})
+    for name in LANE_COLUMNS:
+        table[name] = lanes[name]
+
+    directions = lane_directions(tables)
+    categories = list(tables["groups"])
+    depart_direction = table["departLane"].map(directions).astype(object)
+    arrival_direction = table["arrivalLane"].map(directions).astype(object)
+    table["direction"] = pd.Categorical(depart_direction.fillna(arrival_direction), categories=categories)
+    if junction is not None:
+        table["junction_direction"] = pd.Categorical([junction.get(trip_id) for trip_id in ids], categories=categories)
+    return table
+
+
+def summarize_trips(table):
+    """Per-direction delay, travel time and throughput of a trip table
+
+    Delay and travel times cover every trip by its heading. Throughput counts
+    the trips crossing the junction per approach when the table has
+    junction_direction, else every trip by its heading.
+    """
+    # Throughput is measured over the span in which trips were on the network
+    horizon = (table["depart"] + table["duration"]).max() - table["depart"].min() if len(table) else 0
+
+    summary = table.groupby("direction", observed=False).agg(
+        trips=("depart", "size"),
+        avg_delay=("timeLoss", "mean"),
+        avg_travel_time=("duration", "mean"),
+        avg_waiting_time=("waitingTime", "mean"),
+        avg_route_length=("routeLength", "mean"),
+    )
+    if "junction_direction" in table:
+        crossing = table.groupby("junction_direction", observed=False).size()
+        summary["junction_trips"] = crossing.reindex(summary.index, fill_value=0).to_numpy()
+    else:
+        summary["junction_trips"] = summary["trips"]
+    summary["throughput"] = summary["junction_trips"] * 3600 / horizon if horizon else 0.0
+    return summary.fillna(0.0)
+
+
+def write_trip_summary(summary, output_csv):
+    """Save a trip summary next to the detector CSV"""
+    summary.rename(columns={
+        "trips": "Trips",
+        "avg_delay": "Average Delay (s)",
+        "avg_travel_time": "Average Travel Time (s)",
+        "avg_waiting_time": "Average Waiting Time (s)",
+        "avg_route_length": "Average Route Length (m)",
+        "junction_trips": "Junction Trips",
+        "throughput": "Throughput (veh/hr)",
+    }).rename_axis("Direction").to_csv(output_csv)